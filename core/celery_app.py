@@ -10,6 +10,20 @@ app = celery.Celery('core')
 app.config_from_object('django.conf:settings')
 app.conf.broker_url = settings.CELERY_BROKER_URL
 app.autodiscover_tasks()
+app.conf.beat_schedule = {
+    'prune-expired-tokens': {
+        'task': 'jwt_registration.tasks.prune_expired_tokens',
+        'schedule': settings.TOKEN_PRUNE_INTERVAL,
+    },
+    'dispatch-pending-outbox-messages': {
+        'task': 'jwt_registration.tasks.dispatch_pending_outbox_messages',
+        'schedule': settings.OUTBOX_SWEEP_INTERVAL,
+    },
+    'dispatch-verification-emails': {
+        'task': 'jwt_registration.tasks.dispatch_verification_emails',
+        'schedule': settings.EMAIL_DISPATCH_INTERVAL,
+    },
+}
 
 
 @app.task()
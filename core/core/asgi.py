@@ -14,3 +14,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_asgi_application()
+
+from jwt_registration.token_validation import FastTokenValidateASGIApplication  # noqa: E402
+
+application = FastTokenValidateASGIApplication(application)
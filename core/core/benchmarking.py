@@ -0,0 +1,28 @@
+import math
+import statistics
+import time
+
+from django.core.management.base import CommandError
+
+
+def measure(call, iterations, before=None):
+    if iterations < 1:
+        raise CommandError('--iterations must be at least 1')
+    call()
+    timings = []
+    for _ in range(iterations):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1_000_000)
+    return timings
+
+
+def report(stdout, name, timings, width):
+    timings = sorted(timings)
+    p99 = timings[max(0, math.ceil(len(timings) * 0.99) - 1)]
+    stdout.write(
+        f'{name:<{width}} mean={statistics.mean(timings):8.1f}us '
+        f'p50={statistics.median(timings):8.1f}us p99={p99:8.1f}us'
+    )
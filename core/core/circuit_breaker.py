@@ -0,0 +1,139 @@
+import time
+from functools import cache
+
+from django.conf import settings
+from loguru import logger
+from redis import RedisError
+
+from core.metrics import CIRCUIT_BREAKER_REJECTED, CIRCUIT_BREAKER_STATE
+from core.redis_client import get_redis_client, make_redis_key
+
+# KEYS: state hash, latencies list; ARGV: operation, now (ms), failure threshold, open timeout (ms),
+# latency window, min samples, latency percentile, latency threshold (ms), latency (ms).
+# The state hash keeps 'until': when an open circuit may half-open, or when a lost probe expires.
+CIRCUIT_BREAKER_SCRIPT = """
+local operation = ARGV[1]
+local now = tonumber(ARGV[2])
+local open_timeout = tonumber(ARGV[4])
+local state = redis.call('HGET', KEYS[1], 'state') or 'closed'
+
+local function open()
+    redis.call('HSET', KEYS[1], 'state', 'open', 'until', now + open_timeout, 'failures', 0)
+    redis.call('DEL', KEYS[2])
+    return {0, 'open'}
+end
+
+if operation == 'allow' then
+    if state == 'closed' then
+        return {1, state}
+    end
+    if now < tonumber(redis.call('HGET', KEYS[1], 'until')) then
+        return {0, state}
+    end
+    redis.call('HSET', KEYS[1], 'state', 'half_open', 'until', now + open_timeout)
+    return {1, 'half_open'}
+end
+
+if state == 'open' then
+    return {0, state}
+end
+
+if operation == 'failure' then
+    if state == 'half_open' or redis.call('HINCRBY', KEYS[1], 'failures', 1) >= tonumber(ARGV[3]) then
+        return open()
+    end
+    return {1, state}
+end
+
+if state == 'half_open' then
+    redis.call('DEL', KEYS[1], KEYS[2])
+    return {1, 'closed'}
+end
+redis.call('HSET', KEYS[1], 'failures', 0)
+redis.call('LPUSH', KEYS[2], ARGV[9])
+redis.call('LTRIM', KEYS[2], 0, tonumber(ARGV[5]) - 1)
+local samples = redis.call('LRANGE', KEYS[2], 0, -1)
+if #samples >= tonumber(ARGV[6]) then
+    for i = 1, #samples do
+        samples[i] = tonumber(samples[i])
+    end
+    table.sort(samples)
+    local index = math.max(1, math.ceil(#samples * tonumber(ARGV[7])))
+    if samples[index] > tonumber(ARGV[8]) then
+        return open()
+    end
+end
+return {1, state}
+"""
+
+
+class CircuitBreaker:
+    STATES = {'closed': 0, 'half_open': 1, 'open': 2}
+
+    def __init__(
+            self,
+            name: str,
+            failure_threshold: int,
+            latency_threshold: float,
+            latency_percentile: float,
+            latency_window: int,
+            min_samples: int,
+            open_timeout: float
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.latency_threshold = latency_threshold
+        self.latency_percentile = latency_percentile
+        self.latency_window = latency_window
+        self.min_samples = min_samples
+        self.open_timeout = open_timeout
+
+    def allow(self) -> bool:
+        allowed = self._run('allow')
+        if not allowed:
+            CIRCUIT_BREAKER_REJECTED.labels(self.name).inc()
+        return allowed
+
+    def record_success(self, latency: float):
+        self._run('success', latency)
+
+    def record_failure(self):
+        self._run('failure')
+
+    def reset(self):
+        try:
+            get_redis_client().delete(*self._keys())
+        except RedisError as e:
+            logger.error(f'Circuit breaker {self.name} is unavailable: {e}')
+        CIRCUIT_BREAKER_STATE.labels(self.name).set(self.STATES['closed'])
+
+    def _run(self, operation, latency=0.0) -> bool:
+        try:
+            allowed, state = self._script()(keys=self._keys(), args=[
+                operation,
+                int(time.time() * 1000),
+                self.failure_threshold,
+                int(self.open_timeout * 1000),
+                self.latency_window,
+                self.min_samples,
+                self.latency_percentile,
+                int(self.latency_threshold * 1000),
+                int(latency * 1000),
+            ])
+        except RedisError as e:
+            logger.error(f'Circuit breaker {self.name} is unavailable: {e}')
+            return True
+        state = state.decode() if isinstance(state, bytes) else state
+        CIRCUIT_BREAKER_STATE.labels(self.name).set(self.STATES[state])
+        return bool(allowed)
+
+    def _keys(self):
+        return [
+            make_redis_key(settings.CIRCUIT_BREAKER_CACHE_KEY.format(name=self.name, kind=kind))
+            for kind in ('state', 'latencies')
+        ]
+
+    @staticmethod
+    @cache
+    def _script():
+        return get_redis_client().register_script(CIRCUIT_BREAKER_SCRIPT)
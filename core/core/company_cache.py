@@ -0,0 +1,146 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+
+from django.conf import settings
+from django.core.cache import cache as django_cache
+from loguru import logger
+from redis import RedisError
+
+from core.company_client import CompanyServiceClient, get_company_client
+from core.metrics import COMPANY_SERVICE_CACHE_REFRESHES, COMPANY_SERVICE_CACHE_REQUESTS
+from core.redis_client import get_redis_client, make_redis_key
+
+# Every company keeps its cached responses in one hash named after the company's version. Invalidation bumps the
+# version, so a refresh that was already running when it arrived writes into an orphaned hash.
+# KEYS: version counter; ARGV: seed, counter ttl, hash name without the version suffix, path.
+# Returns {version, cached entry or false}.
+COMPANY_SERVICE_CACHE_SCRIPT = """
+local version = redis.call('GET', KEYS[1])
+if not version then
+    version = ARGV[1]
+    redis.call('SET', KEYS[1], version, 'EX', ARGV[2])
+end
+return {version, redis.call('HGET', ARGV[3] .. version, ARGV[4])}
+"""
+
+
+class CompanyServiceCache:
+
+    def __init__(self, client: CompanyServiceClient, soft_ttl: float, hard_ttl: int, refresh_timeout: int):
+        self.client = client
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+        self.refresh_timeout = refresh_timeout
+
+    def get(self, company, path):
+        version, entry = self._read(company, path)
+        if entry is not None:
+            age = time.time() - entry['fetched_at']
+            if age < self.soft_ttl:
+                COMPANY_SERVICE_CACHE_REQUESTS.labels('fresh').inc()
+                return 200, entry['data']
+            if age < self.hard_ttl:
+                COMPANY_SERVICE_CACHE_REQUESTS.labels('stale').inc()
+                self._schedule_refresh(company, path, version)
+                return 200, entry['data']
+
+        COMPANY_SERVICE_CACHE_REQUESTS.labels('miss').inc()
+        return self._fetch(company, path, version)
+
+    def invalidate(self, company):
+        try:
+            with get_redis_client().pipeline(transaction=False) as pipe:
+                pipe.set(self._version_key(company), _seed(), ex=self.hard_ttl, nx=True)
+                pipe.incr(self._version_key(company))
+                pipe.expire(self._version_key(company), self.hard_ttl)
+                pipe.execute()
+        except RedisError as e:
+            logger.error(f'Company service cache for company {company} was not invalidated: {e}')
+            return False
+        return True
+
+    def _fetch(self, company, path, version):
+        fetched_at = time.time()
+        response = self.client.get(path)
+        if response.status_code != 200:
+            return response.status_code, None
+        data = response.json()
+        if version is not None:
+            self._write(company, path, version, {'fetched_at': fetched_at, 'data': data})
+        return 200, data
+
+    def _schedule_refresh(self, company, path, version):
+        lock_key = settings.COMPANY_SERVICE_REFRESH_LOCK_CACHE_KEY.format(company=company, path=path)
+        try:
+            if not django_cache.add(lock_key, 1, timeout=self.refresh_timeout):
+                return
+        except RedisError as e:
+            logger.error(f'Company service cache refresh lock is unavailable: {e}')
+            return
+        get_company_service_cache_executor().submit(self._refresh, company, path, version, lock_key)
+
+    def _refresh(self, company, path, version, lock_key):
+        try:
+            status_code, _ = self._fetch(company, path, version)
+        except Exception as e:
+            logger.warning(f'Refreshing {path} from the company service failed: {e}')
+            status_code = None
+        finally:
+            django_cache.delete(lock_key)
+        COMPANY_SERVICE_CACHE_REFRESHES.labels('ok' if status_code == 200 else 'failed').inc()
+
+    def _read(self, company, path):
+        try:
+            version, entry = self._script()(
+                keys=[self._version_key(company)],
+                args=[_seed(), self.hard_ttl, self._hash_key(company, ''), path],
+            )
+        except RedisError as e:
+            logger.error(f'Company service cache is unavailable: {e}')
+            return None, None
+        return int(version), None if entry is None else json.loads(entry)
+
+    def _write(self, company, path, version, entry):
+        try:
+            with get_redis_client().pipeline(transaction=False) as pipe:
+                pipe.hset(self._hash_key(company, version), path, json.dumps(entry))
+                pipe.expire(self._hash_key(company, version), self.hard_ttl)
+                pipe.expire(self._version_key(company), self.hard_ttl, gt=True)
+                pipe.execute()
+        except RedisError as e:
+            logger.error(f'Company service cache is unavailable: {e}')
+
+    @staticmethod
+    def _version_key(company):
+        return make_redis_key(settings.COMPANY_SERVICE_VERSION_CACHE_KEY.format(company=company))
+
+    @staticmethod
+    def _hash_key(company, version):
+        return make_redis_key(settings.COMPANY_SERVICE_CACHE_KEY.format(company=company, version=version))
+
+    @staticmethod
+    @cache
+    def _script():
+        return get_redis_client().register_script(COMPANY_SERVICE_CACHE_SCRIPT)
+
+
+def _seed():
+    return time.time_ns() // 1000
+
+
+@cache
+def get_company_service_cache_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(
+        max_workers=settings.COMPANY_SERVICE_CACHE_REFRESH_WORKERS, thread_name_prefix='company-cache-refresh')
+
+
+@cache
+def get_company_service_cache() -> CompanyServiceCache:
+    return CompanyServiceCache(
+        client=get_company_client(),
+        soft_ttl=settings.COMPANY_SERVICE_CACHE_SOFT_TTL,
+        hard_ttl=settings.COMPANY_SERVICE_CACHE_HARD_TTL,
+        refresh_timeout=settings.COMPANY_SERVICE_CACHE_REFRESH_TIMEOUT,
+    )
@@ -0,0 +1,88 @@
+import time
+from functools import cache
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from core.circuit_breaker import CircuitBreaker
+from core.exeptions import CompanyServiceCircuitOpen, CompanyServiceUnavailable
+
+
+class CompanyServiceClient:
+    def __init__(
+            self,
+            base_url: str,
+            connect_timeout: float,
+            read_timeout: float,
+            pool_size: int,
+            retries: int,
+            backoff_factor: float,
+            circuit_breaker: CircuitBreaker | None = None
+    ):
+        self.base_url = base_url
+        self.circuit_breaker = circuit_breaker
+        self.timeout = (connect_timeout, read_timeout)
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({'GET', 'HEAD'}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def url(self, path):
+        return self.base_url.format(path)
+
+    def request(self, method, path, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        breaker = self.circuit_breaker
+        if breaker is not None and not breaker.allow():
+            raise CompanyServiceCircuitOpen()
+
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.url(path), **kwargs)
+        except requests.RequestException as e:
+            if breaker is not None:
+                breaker.record_failure()
+            raise CompanyServiceUnavailable() from e
+
+        if breaker is not None:
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success(time.perf_counter() - start)
+        return response
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+
+@cache
+def get_company_client() -> CompanyServiceClient:
+    return CompanyServiceClient(
+        base_url=settings.COMPANY_SERVICE_URL,
+        connect_timeout=settings.COMPANY_SERVICE_CONNECT_TIMEOUT,
+        read_timeout=settings.COMPANY_SERVICE_READ_TIMEOUT,
+        pool_size=settings.COMPANY_SERVICE_POOL_SIZE,
+        retries=settings.COMPANY_SERVICE_RETRIES,
+        backoff_factor=settings.COMPANY_SERVICE_RETRY_BACKOFF,
+        circuit_breaker=CircuitBreaker(
+            name='company_service',
+            failure_threshold=settings.COMPANY_SERVICE_CIRCUIT_FAILURES,
+            latency_threshold=settings.COMPANY_SERVICE_CIRCUIT_LATENCY,
+            latency_percentile=settings.COMPANY_SERVICE_CIRCUIT_PERCENTILE,
+            latency_window=settings.COMPANY_SERVICE_CIRCUIT_WINDOW,
+            min_samples=settings.COMPANY_SERVICE_CIRCUIT_MIN_SAMPLES,
+            open_timeout=settings.COMPANY_SERVICE_CIRCUIT_OPEN_TIMEOUT,
+        ),
+    )
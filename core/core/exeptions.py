@@ -5,4 +5,39 @@ from rest_framework.exceptions import APIException
 class TwoCommitsError(APIException):
     status_code = status.HTTP_400_BAD_REQUEST
     default_detail = 'problem with two commits'
-    default_code = 'error'
\ No newline at end of file
+    default_code = 'error'
+
+
+class PasswordHashingUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'password hashing is overloaded, try again later'
+    default_code = 'service_unavailable'
+
+
+class CompanyServiceUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'company service is unavailable, try again later'
+    default_code = 'service_unavailable'
+
+
+class CompanyServiceCircuitOpen(CompanyServiceUnavailable):
+    default_detail = 'company service is failing, requests are paused, try again later'
+    default_code = 'circuit_open'
+
+
+class CompanyServiceCacheUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'company service cache is unavailable, nothing was invalidated, try again later'
+    default_code = 'service_unavailable'
+
+
+class RegistrationInProgress(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'registration for this email is already in progress'
+    default_code = 'conflict'
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = 'idempotency key was already used for a different request'
+    default_code = 'idempotency_key_reused'
@@ -0,0 +1,49 @@
+from django.http import HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+PASSWORD_HASHING_SECONDS = Histogram(
+    'password_hashing_seconds', 'Time spent hashing or verifying a password', ['operation'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+PASSWORD_HASHING_BUSY_WORKERS = Gauge(
+    'password_hashing_busy_workers', 'Password hashing pool workers currently running a job')
+PASSWORD_HASHING_QUEUED_JOBS = Gauge(
+    'password_hashing_queued_jobs', 'Password hashing jobs waiting for a free worker')
+PASSWORD_HASHING_REJECTED = Counter(
+    'password_hashing_rejected_total', 'Password hashing jobs rejected by the pool', ['reason'])
+
+CIRCUIT_BREAKER_STATE = Gauge(
+    'circuit_breaker_state', 'Circuit breaker state last seen by this process (0 closed, 1 half-open, 2 open)',
+    ['circuit'])
+CIRCUIT_BREAKER_REJECTED = Counter(
+    'circuit_breaker_rejected_total', 'Calls rejected without being sent because the circuit is open', ['circuit'])
+
+EMAIL_BATCH_SECONDS = Histogram(
+    'email_batch_seconds', 'Time spent sending one batch of queued emails',
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+EMAIL_BATCH_THROUGHPUT = Gauge(
+    'email_batch_throughput', 'Emails per second sent by the last batch in this process')
+EMAILS_PROCESSED = Counter(
+    'emails_processed_total', 'Queued emails by outcome', ['result'])
+
+EMAIL_VERIFY_SUPPRESSED = Counter(
+    'email_verify_suppressed_total', 'Verification emails not sent because the user is still in cooldown')
+
+
+PROFILE_CACHE_REQUESTS = Counter(
+    'profile_cache_requests_total', 'Rendered profile lookups by cache tier and result', ['tier', 'result'])
+PROFILE_CACHE_EVICTIONS = Counter(
+    'profile_cache_evictions_total', 'Rendered profiles dropped from a cache tier', ['tier', 'reason'])
+PROFILE_CACHE_BYTES = Gauge(
+    'profile_cache_bytes', 'Bytes of rendered profiles held by this process', ['tier'])
+
+
+COMPANY_SERVICE_CACHE_REQUESTS = Counter(
+    'company_service_cache_requests_total', 'Company service lookups by cache result (fresh, stale, miss)', ['result'])
+COMPANY_SERVICE_CACHE_REFRESHES = Counter(
+    'company_service_cache_refreshes_total', 'Background refreshes of stale company service responses', ['result'])
+
+
+def metrics_view(request):
+    return HttpResponse(generate_latest(), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,9 @@
+from django.core.cache import cache
+
+
+def get_redis_client():
+    return cache._cache.get_client(write=True)
+
+
+def make_redis_key(key):
+    return cache.make_key(key)
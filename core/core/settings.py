@@ -1,8 +1,10 @@
+import json
 import os
 import socket
 import sys
 from datetime import timedelta
 from pathlib import Path
+from django.conf import global_settings
 from dotenv import load_dotenv
 
 from loguru import logger
@@ -111,6 +113,15 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Written by `manage.py calibrate_password_hashers --write`
+PASSWORD_HASHERS_PROFILE_PATH = os.path.join(BASE_DIR, 'password_hashers.json')
+PASSWORD_HASHERS_PROFILE = {}
+if os.path.exists(PASSWORD_HASHERS_PROFILE_PATH):
+    with open(PASSWORD_HASHERS_PROFILE_PATH) as profile:
+        PASSWORD_HASHERS_PROFILE = json.load(profile)
+PASSWORD_HASHERS = PASSWORD_HASHERS_PROFILE.get('hashers', global_settings.PASSWORD_HASHERS)
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
 
@@ -141,10 +152,20 @@ REST_FRAMEWORK = {
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'NUM_PROXIES': 1,
 }
 
+# RS256 and EdDSA read the private key from JWT_PRIVATE_KEY_PATH. Public keys of retired signing keys stay
+# published in the JWKS and accepted until the tokens they signed expire.
+JWT_ALGORITHM = os.environ.get('JWT_ALGORITHM', 'HS256')
+JWT_PRIVATE_KEY_PATH = os.environ.get('JWT_PRIVATE_KEY_PATH')
+JWT_RETIRED_PUBLIC_KEY_PATHS = [path for path in os.environ.get('JWT_RETIRED_PUBLIC_KEY_PATHS', '').split(',') if path]
+JWKS_MAX_AGE = 60 * 60
+
 SIMPLE_JWT = {
 
+    'ALGORITHM': JWT_ALGORITHM,
+
     'ROTATE_REFRESH_TOKENS': True,
 
     'BLACKLIST_AFTER_ROTATION': True,
@@ -153,8 +174,51 @@ SIMPLE_JWT = {
 
     'REFRESH_TOKEN_LIFETIME': timedelta(days=90),
 
+    'TOKEN_REFRESH_SERIALIZER': 'jwt_registration.serializers.BlacklistTokenRefreshSerializer',
+
+    'TOKEN_VERIFY_SERIALIZER': 'jwt_registration.serializers.BlacklistTokenVerifySerializer',
+
 }
 
+# 'jwt_registration.blacklist.DatabaseTokenBlacklist' keeps revoked tokens in Postgres
+TOKEN_BLACKLIST_BACKEND = os.environ.get(
+    'TOKEN_BLACKLIST_BACKEND', 'jwt_registration.blacklist.RedisTokenBlacklist')
+TOKEN_BLACKLIST_CACHE_KEY = 'token_blacklist_{jti}'
+# 'buffered' queues issued refresh tokens in memory and bulk inserts them from a background thread
+TOKEN_BOOKKEEPING = os.environ.get('TOKEN_BOOKKEEPING', 'sync')
+TOKEN_BOOKKEEPING_FLUSH_INTERVAL = 0.5
+TOKEN_BOOKKEEPING_BATCH_SIZE = 200
+TOKEN_PRUNE_INTERVAL = timedelta(hours=6)
+TOKEN_PRUNE_BATCH_SIZE = 1000
+TOKEN_PRUNE_BATCH_PAUSE = 0.5
+
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_RETRY_BASE = 10
+OUTBOX_RETRY_MAX = 60 * 60
+OUTBOX_LEASE = 5 * 60
+OUTBOX_SWEEP_INTERVAL = timedelta(minutes=1)
+OUTBOX_SWEEP_BATCH_SIZE = 100
+OUTBOX_DISPATCH_WORKERS = 4
+
+PASSWORD_HASHING_WORKERS = int(os.environ.get('PASSWORD_HASHING_WORKERS', 2))
+PASSWORD_HASHING_QUEUE_SIZE = int(os.environ.get('PASSWORD_HASHING_QUEUE_SIZE', 8))
+PASSWORD_HASHING_TIMEOUT = 5
+
+LOGIN_ATTEMPTS_CACHE_KEY = 'login_attempts_{kind}_{scope}'
+LOGIN_ATTEMPTS_WINDOW = 60
+LOGIN_ATTEMPTS_PER_EMAIL = 5
+LOGIN_ATTEMPTS_PER_IP = 30
+LOGIN_BACKOFF_BASE = 30
+LOGIN_BACKOFF_MAX = 60 * 60
+LOGIN_STRIKES_TTL = 24 * 60 * 60
+
+REGISTRATION_IDEMPOTENCY_CACHE_KEY = 'registration_idempotency_{key}'
+REGISTRATION_IDEMPOTENCY_TTL = 24 * 60 * 60
+REGISTRATION_LOCK_CACHE_KEY = 'registration_lock_{email}'
+REGISTRATION_LOCK_TIMEOUT = 10
+REGISTRATION_LOCK_WAIT = 5
+REGISTRATION_LOCK_POLL = 0.05
+
 CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.redis.RedisCache",
@@ -207,13 +271,47 @@ hostname, _, ips = socket.gethostbyname_ex(socket.gethostname())
 INTERNAL_IPS += [".".join(ip.split(".")[:-1] + ["1"]) for ip in ips]
 
 CACHE_LIVE_TIME = 60 * 60
-USER_PROFILE_CACHE_KEY = 'user_profile_{user}'
+USER_PROFILE_CACHE_KEY = 'user_profile_{user}_{version}'
+USER_PROFILE_VERSION_CACHE_KEY = 'user_profile_version_{user}'
+USER_PROFILE_BATCH_CACHE_KEY = 'user_profile_batch_{user}_{version}'
+USER_PROFILE_INVALIDATION_CHANNEL = 'user_profile_invalidate'
+PROFILE_LOCAL_CACHE_SIZE = int(os.environ.get('PROFILE_LOCAL_CACHE_SIZE', 0))
+PROFILE_LOCAL_CACHE_TTL = 30
+PROFILE_BATCH_MAX_SIZE = 10000
+PROFILE_BATCH_CHUNK_SIZE = 500
+COMPANY_MEMBERS_STREAM_CHUNK_SIZE = 500
+COMPANY_DEPARTMENTS_STREAM_CHUNK_SIZE = 50
 STORAGE_ACCESS_KEY = os.getenv('ACCESS_STORAGE_KEY')
 STORAGE_SECRET_KEY = os.getenv('SECRET_STORAGE_KEY')
 BUCKET_NAME = 'bucket-for-user-avatar'
 STORAGE_URL = f'https://s3.storage.selcloud.ru/'
 COMPANY_SERVICE_URL = 'http://92.63.67.98:8002/company-service/{}'
+COMPANY_SERVICE_CONNECT_TIMEOUT = 2
+COMPANY_SERVICE_READ_TIMEOUT = 5
+COMPANY_SERVICE_POOL_SIZE = 10
+COMPANY_SERVICE_RETRIES = 2
+COMPANY_SERVICE_RETRY_BACKOFF = 0.2
+COMPANY_SERVICE_CIRCUIT_FAILURES = 5
+COMPANY_SERVICE_CIRCUIT_LATENCY = 2
+COMPANY_SERVICE_CIRCUIT_PERCENTILE = 0.95
+COMPANY_SERVICE_CIRCUIT_WINDOW = 50
+COMPANY_SERVICE_CIRCUIT_MIN_SAMPLES = 20
+COMPANY_SERVICE_CIRCUIT_OPEN_TIMEOUT = 30
+CIRCUIT_BREAKER_CACHE_KEY = 'circuit_breaker_{kind}_{name}'
+COMPANY_SERVICE_CACHE_SOFT_TTL = 60
+COMPANY_SERVICE_CACHE_HARD_TTL = 60 * 60
+COMPANY_SERVICE_CACHE_REFRESH_TIMEOUT = 30
+COMPANY_SERVICE_CACHE_REFRESH_WORKERS = 2
+COMPANY_SERVICE_CACHE_KEY = 'company_service_{company}_{version}'
+COMPANY_SERVICE_VERSION_CACHE_KEY = 'company_service_version_{company}'
+COMPANY_SERVICE_REFRESH_LOCK_CACHE_KEY = 'company_service_refresh_{company}_{path}'
+TWO_COMMITS_SERVICE_CLIENTS = {
+    'company': 'core.company_client.get_company_client',
+}
+TWO_COMMITS_DEADLINE = 10
+TWO_COMMITS_WORKERS = 8
 REGISTRATION_SERVICE_URL = 'http://92.63.67.98:8000'
+FAST_TOKEN_VALIDATE_PATH = '/account/api/v1/token/fast-validate/'
 
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.yandex.ru'
@@ -223,6 +321,18 @@ EMAIL_USE_TLS = False
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER + '@yandex.ru'
+EMAIL_TIMEOUT = 10
+EMAIL_QUEUE_CACHE_KEY = 'email_queue'
+EMAIL_DISPATCH_SCHEDULED_CACHE_KEY = 'email_dispatch_scheduled'
+EMAIL_BATCH_SIZE = 50
+EMAIL_BATCH_DELAY = 1
+EMAIL_DISPATCH_WORKERS = 1
+EMAIL_RECONNECT_ATTEMPTS = 1
+EMAIL_DISPATCH_INTERVAL = timedelta(minutes=1)
+EMAIL_VERIFY_COOLDOWN_CACHE_KEY = 'email_verify_cooldown_{user}'
+EMAIL_VERIFY_COOLDOWN = 60
+EMAIL_VERIFY_TOKEN_MAX_AGE = 60 * 60
+EMAIL_VERIFY_CONSUMED_CACHE_KEY = 'email_verify_consumed_{token}'
 
 CELERY_TASK_ALWAYS_EAGER = True
 CELERY_TASK_EAGER_PROPAGATES = True
@@ -1,4 +1,4 @@
-from drf_spectacular.utils import OpenApiResponse, OpenApiExample
+from drf_spectacular.utils import OpenApiResponse, OpenApiExample, OpenApiParameter
 
 response_for_registration = {
     201: OpenApiResponse(
@@ -72,9 +72,41 @@ response_for_registration = {
                 status_codes=["400"]
             )
         ],
-    )
+    ),
+    409: OpenApiResponse(
+        response={
+            'detail': 'string'
+        },
+        description='Another registration for this email is still running',
+    ),
+    422: OpenApiResponse(
+        response={
+            'detail': 'string'
+        },
+        description='The Idempotency-Key was already used for a different request',
+    ),
 }
 
+parameters_for_registration = [
+    OpenApiParameter(
+        name='Idempotency-Key',
+        type=str,
+        location=OpenApiParameter.HEADER,
+        required=False,
+        description='Client generated unique key. Retrying with the same key and body returns the stored response.',
+    ),
+]
+
+parameters_for_streaming = [
+    OpenApiParameter(
+        name='stream',
+        type=bool,
+        location=OpenApiParameter.QUERY,
+        required=False,
+        description='Stream the JSON array element by element instead of rendering it in one piece.',
+    ),
+]
+
 response_for_login = {
     200: OpenApiResponse(
         response={
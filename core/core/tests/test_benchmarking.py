@@ -0,0 +1,28 @@
+from io import StringIO
+from unittest.mock import MagicMock
+
+from django.core.management.base import CommandError, OutputWrapper
+from django.test import SimpleTestCase
+
+from core.benchmarking import measure, report
+
+
+class BenchmarkingTestCase(SimpleTestCase):
+
+    def test_measure_warms_up_and_runs_before_each_call(self):
+        call, before = MagicMock(), MagicMock()
+        self.assertEqual(len(measure(call, 3, before=before)), 3)
+        self.assertEqual(call.call_count, 4)
+        self.assertEqual(before.call_count, 3)
+
+    def test_measure_rejects_no_iterations(self):
+        with self.assertRaises(CommandError):
+            measure(MagicMock(), 0)
+
+    def test_report_p99_of_few_timings(self):
+        output = StringIO()
+        report(OutputWrapper(output), 'one', [5.0], width=4)
+        report(OutputWrapper(output), 'few', [4.0, 1.0, 3.0, 2.0], width=4)
+        lines = output.getvalue().splitlines()
+        self.assertTrue(lines[0].endswith('p99=     5.0us'))
+        self.assertTrue(lines[1].endswith('p99=     4.0us'))
@@ -0,0 +1,87 @@
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from redis import RedisError
+
+from core.circuit_breaker import CircuitBreaker
+from core.metrics import CIRCUIT_BREAKER_STATE
+
+
+class CircuitBreakerTestCase(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.breaker = CircuitBreaker(
+            name='test',
+            failure_threshold=3,
+            latency_threshold=0.5,
+            latency_percentile=0.9,
+            latency_window=10,
+            min_samples=5,
+            open_timeout=0.05,
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def state(self):
+        return CIRCUIT_BREAKER_STATE.labels('test')._value.get()
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success(0.01)
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.allow())
+
+        self.breaker.record_failure()
+        self.assertEqual(self.state(), CircuitBreaker.STATES['open'])
+        self.assertFalse(self.breaker.allow())
+
+    def test_opens_on_slow_latency_percentile(self):
+        for _ in range(4):
+            self.breaker.record_success(0.01)
+        self.breaker.record_success(1)
+        self.assertFalse(self.breaker.allow())
+
+    def test_fast_latency_keeps_circuit_closed(self):
+        for _ in range(20):
+            self.breaker.record_success(0.01)
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.state(), CircuitBreaker.STATES['closed'])
+
+    def test_half_open_allows_single_probe_and_closes_on_success(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+        time.sleep(0.06)
+
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.state(), CircuitBreaker.STATES['half_open'])
+        self.assertFalse(self.breaker.allow())
+
+        self.breaker.record_success(0.01)
+        self.assertEqual(self.state(), CircuitBreaker.STATES['closed'])
+        self.assertTrue(self.breaker.allow())
+
+    def test_failed_probe_reopens(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+        time.sleep(0.06)
+        self.assertTrue(self.breaker.allow())
+
+        self.breaker.record_failure()
+        self.assertEqual(self.state(), CircuitBreaker.STATES['open'])
+        self.assertFalse(self.breaker.allow())
+
+    def test_state_is_shared_between_instances(self):
+        other = CircuitBreaker(**{**self.breaker.__dict__})
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.assertFalse(other.allow())
+
+    @patch.object(CircuitBreaker, '_script', side_effect=RedisError)
+    def test_fails_open_without_redis(self, mock_script):
+        self.assertTrue(self.breaker.allow())
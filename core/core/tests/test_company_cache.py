@@ -0,0 +1,72 @@
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.utils import timezone
+from freezegun import freeze_time
+
+from core.company_cache import CompanyServiceCache
+
+PATH = 'api/v1/company/companies/1/departments/'
+
+
+class CompanyServiceCacheTestCase(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = MagicMock()
+        self.client.get.return_value = MagicMock(status_code=200, json=MagicMock(return_value=[{'id': 1}]))
+        self.cache = CompanyServiceCache(self.client, soft_ttl=60, hard_ttl=600, refresh_timeout=30)
+        self.executor = MagicMock()
+        patcher = patch('core.company_cache.get_company_service_cache_executor', return_value=self.executor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.now = timezone.now()
+
+    def get(self, seconds_later=0):
+        with freeze_time(self.now + timedelta(seconds=seconds_later)):
+            return self.cache.get(1, PATH)
+
+    def test_fresh_entry_is_served_without_upstream_call(self):
+        self.assertEqual(self.get(), (200, [{'id': 1}]))
+        self.assertEqual(self.get(59), (200, [{'id': 1}]))
+        self.client.get.assert_called_once_with(PATH)
+        self.executor.submit.assert_not_called()
+
+    def test_stale_entry_is_served_while_one_refresh_runs(self):
+        self.get()
+        self.client.get.return_value.json.return_value = [{'id': 2}]
+
+        self.assertEqual(self.get(120), (200, [{'id': 1}]))
+        self.assertEqual(self.get(121), (200, [{'id': 1}]))
+        self.executor.submit.assert_called_once()
+        self.assertEqual(self.client.get.call_count, 1)
+
+        with freeze_time(self.now + timedelta(seconds=122)):
+            self.executor.submit.call_args.args[0](*self.executor.submit.call_args.args[1:])
+        self.assertEqual(self.get(123), (200, [{'id': 2}]))
+        self.get(200)
+        self.assertEqual(self.executor.submit.call_count, 2)
+
+    def test_entry_past_hard_ttl_is_refetched(self):
+        self.get()
+        self.client.get.return_value.json.return_value = [{'id': 2}]
+        self.assertEqual(self.get(601), (200, [{'id': 2}]))
+        self.executor.submit.assert_not_called()
+
+    def test_error_responses_are_not_cached(self):
+        self.client.get.return_value.status_code = 404
+        self.assertEqual(self.get(), (404, None))
+        self.get()
+        self.assertEqual(self.client.get.call_count, 2)
+
+    def test_invalidation_drops_entries_and_in_flight_refreshes(self):
+        self.get()
+        self.get(120)
+        self.assertTrue(self.cache.invalidate(1))
+        self.client.get.return_value.json.return_value = [{'id': 2}]
+        self.executor.submit.call_args.args[0](*self.executor.submit.call_args.args[1:])
+
+        self.client.get.return_value.json.return_value = [{'id': 3}]
+        self.assertEqual(self.get(121), (200, [{'id': 3}]))
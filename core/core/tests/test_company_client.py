@@ -0,0 +1,64 @@
+from unittest.mock import patch, MagicMock
+
+import requests
+from django.test import SimpleTestCase
+
+from core.company_client import CompanyServiceClient
+from core.exeptions import CompanyServiceCircuitOpen, CompanyServiceUnavailable
+
+
+class CompanyServiceClientTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.client = CompanyServiceClient(
+            base_url='http://company/company-service/{}',
+            connect_timeout=1,
+            read_timeout=3,
+            pool_size=4,
+            retries=2,
+            backoff_factor=0,
+        )
+
+    def test_session_is_pooled_with_retries_for_idempotent_requests(self):
+        adapter = self.client.session.get_adapter('http://company/')
+        self.assertEqual(adapter._pool_maxsize, 4)
+        self.assertEqual(adapter.max_retries.total, 2)
+        self.assertTrue(adapter.max_retries.is_retry('GET', 503))
+        self.assertFalse(adapter.max_retries.is_retry('POST', 503))
+
+    @patch('requests.Session.request')
+    def test_request_uses_base_url_and_timeouts(self, mock_request):
+        mock_request.return_value = MagicMock(status_code=200)
+
+        response = self.client.get('api/v1/company/companies/1/departments/')
+
+        self.assertEqual(response.status_code, 200)
+        mock_request.assert_called_once_with(
+            'GET', 'http://company/company-service/api/v1/company/companies/1/departments/', timeout=(1, 3))
+
+    @patch('requests.Session.request', side_effect=requests.ConnectTimeout)
+    def test_request_errors_are_reported_as_unavailable(self, mock_request):
+        with self.assertRaises(CompanyServiceUnavailable):
+            self.client.post('api/v1/company/registration/users/create/', data={'email': 'test@example.com'})
+
+    @patch('requests.Session.request')
+    def test_open_circuit_fails_fast(self, mock_request):
+        self.client.circuit_breaker = MagicMock()
+        self.client.circuit_breaker.allow.return_value = False
+
+        with self.assertRaises(CompanyServiceCircuitOpen):
+            self.client.get('api/v1/company/companies/1/departments/')
+        mock_request.assert_not_called()
+
+    @patch('requests.Session.request')
+    def test_outcomes_are_recorded_on_circuit(self, mock_request):
+        self.client.circuit_breaker = MagicMock()
+        mock_request.side_effect = [MagicMock(status_code=404), MagicMock(status_code=503), requests.ReadTimeout]
+
+        self.client.get('api/v1/company/companies/1/departments/')
+        self.client.get('api/v1/company/companies/1/departments/')
+        with self.assertRaises(CompanyServiceUnavailable):
+            self.client.get('api/v1/company/companies/1/departments/')
+
+        self.client.circuit_breaker.record_success.assert_called_once()
+        self.assertEqual(self.client.circuit_breaker.record_failure.call_count, 2)
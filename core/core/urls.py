@@ -19,12 +19,17 @@ from django.contrib import admin
 from django.urls import path, include
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
+from core.metrics import metrics_view
+from jwt_registration.views import jwks
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('account/api/', include('jwt_registration.urls')),
     path('profile/api/', include('user_profile.urls')),
     path('schema/', SpectacularAPIView.as_view(), name='api_schema'),
     path('docs/', SpectacularSwaggerView.as_view(url_name='api_schema'), name='swagger-ui'),
+    path('metrics/', metrics_view, name='metrics'),
+    path('.well-known/jwks.json', jwks, name='jwks'),
 ]
 
 if settings.DEBUG:
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+from jwt_registration.token_validation import FastTokenValidateApplication  # noqa: E402
+
+application = FastTokenValidateApplication(application)
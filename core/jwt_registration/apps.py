@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class JwtRegistrationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'jwt_registration'
+
+    def ready(self):
+        from rest_framework_simplejwt.tokens import Token
+
+        from jwt_registration.signing import get_token_backend
+
+        Token._token_backend = get_token_backend()
@@ -0,0 +1,115 @@
+import json
+import math
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from loguru import logger
+from rest_framework import status
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from core.exeptions import PasswordHashingUnavailable
+from jwt_registration.hashing import aauthenticate_user
+from jwt_registration.throttling import LoginAttemptThrottle, hit_login_limiter, get_login_limiter, email_scope
+from jwt_registration.token_validation import get_access_token_validator, validate_authorization_header
+from jwt_registration.tokens import RefreshToken
+from user_profile.models import User
+
+
+def _request_data(request):
+    if request.content_type != 'application/json':
+        return request.POST
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+@csrf_exempt
+@require_POST
+async def login(request):
+    data = _request_data(request)
+    email = data.get('email')
+    password = data.get('password')
+
+    retry_after = await sync_to_async(hit_login_limiter, thread_sensitive=False)(
+        LoginAttemptThrottle().get_ident(request), email)
+    if retry_after:
+        response = JsonResponse({'detail': 'Request was throttled.'}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        response['Retry-After'] = str(math.ceil(retry_after))
+        return response
+
+    if email is None or password is None:
+        return JsonResponse({'error': 'Email and password are required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        user = await aauthenticate_user(email, password)
+    except PasswordHashingUnavailable as e:
+        return JsonResponse({'detail': e.detail}, status=e.status_code)
+    if user is None:
+        return JsonResponse({'error': 'Incorrect username or password'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    await sync_to_async(get_login_limiter().reset, thread_sensitive=False)(email_scope(email))
+    refresh = await RefreshToken.afor_user(user)
+    refresh.payload.update({
+        'user_id': user.id,
+        'email': user.email
+    })
+    return JsonResponse(
+        {
+            'refresh_token': str(refresh),
+            'access_token': str(refresh.access_token)
+        }, status=status.HTTP_200_OK)
+
+
+@csrf_exempt
+@require_POST
+async def refresh_token(request):
+    raw_token = _request_data(request).get('refresh')
+    if not raw_token:
+        return JsonResponse({'refresh': ['This field is required.']}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        refresh = await RefreshToken.averified(raw_token)
+    except TokenError as e:
+        return JsonResponse({'detail': str(e), 'code': 'token_not_valid'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    data = {'access': str(refresh.access_token)}
+    if api_settings.ROTATE_REFRESH_TOKENS:
+        if api_settings.BLACKLIST_AFTER_ROTATION:
+            await refresh.ablacklist()
+        refresh.set_jti()
+        refresh.set_exp()
+        refresh.set_iat()
+        data['refresh'] = str(refresh)
+    return JsonResponse(data, status=status.HTTP_200_OK)
+
+
+@csrf_exempt
+@require_POST
+async def logout(request):
+    payload = get_access_token_validator().validate_header(request.headers.get('Authorization'))
+    if payload is None or not await User.objects.filter(
+            id=payload[api_settings.USER_ID_CLAIM], is_active=True).aexists():
+        return JsonResponse({'error': 'Invalid token'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    raw_token = _request_data(request).get('refresh_token')
+    if not raw_token:
+        return JsonResponse({'error': 'Refresh token is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        token = await RefreshToken.averified(raw_token)
+        await token.ablacklist()
+    except TokenError as e:
+        logger.critical(f"TokenError: {e}. It might be a potential security threat.")
+        return JsonResponse({'error': 'Invalid refresh token'}, status=status.HTTP_400_BAD_REQUEST)
+    return JsonResponse({'detail': 'Successfully logged out'}, status=status.HTTP_205_RESET_CONTENT)
+
+
+@csrf_exempt
+async def validate_token(request):
+    status_code, body = validate_authorization_header(request.headers.get('Authorization'))
+    return HttpResponse(body, content_type='application/json', status=status_code)
@@ -0,0 +1,88 @@
+from functools import cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache as django_cache
+from django.utils.module_loading import import_string
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow, datetime_from_epoch
+
+
+class BaseTokenBlacklist:
+
+    def blacklist(self, token):
+        raise NotImplementedError
+
+    def is_blacklisted(self, token) -> bool:
+        raise NotImplementedError
+
+    async def ablacklist(self, token):
+        return await sync_to_async(self.blacklist)(token)
+
+    async def ais_blacklisted(self, token) -> bool:
+        return await sync_to_async(self.is_blacklisted)(token)
+
+
+class DatabaseTokenBlacklist(BaseTokenBlacklist):
+
+    def blacklist(self, token):
+        outstanding_token, _ = OutstandingToken.objects.get_or_create(
+            jti=token[api_settings.JTI_CLAIM],
+            defaults={
+                'token': str(token),
+                'expires_at': datetime_from_epoch(token['exp']),
+            },
+        )
+        BlacklistedToken.objects.get_or_create(token=outstanding_token)
+
+    def is_blacklisted(self, token) -> bool:
+        return BlacklistedToken.objects.filter(token__jti=token[api_settings.JTI_CLAIM]).exists()
+
+    async def ablacklist(self, token):
+        outstanding_token, _ = await OutstandingToken.objects.aget_or_create(
+            jti=token[api_settings.JTI_CLAIM],
+            defaults={
+                'token': str(token),
+                'expires_at': datetime_from_epoch(token['exp']),
+            },
+        )
+        await BlacklistedToken.objects.aget_or_create(token=outstanding_token)
+
+    async def ais_blacklisted(self, token) -> bool:
+        return await BlacklistedToken.objects.filter(token__jti=token[api_settings.JTI_CLAIM]).aexists()
+
+
+class RedisTokenBlacklist(BaseTokenBlacklist):
+
+    def blacklist(self, token):
+        self.blacklist_jti(token[api_settings.JTI_CLAIM], datetime_from_epoch(token['exp']))
+
+    def blacklist_jti(self, jti, expires_at):
+        timeout = self._timeout(expires_at)
+        if timeout > 0:
+            django_cache.set(self._key(jti), 1, timeout=timeout)
+
+    def is_blacklisted(self, token) -> bool:
+        return django_cache.has_key(self._key(token[api_settings.JTI_CLAIM]))
+
+    async def ablacklist(self, token):
+        timeout = self._timeout(datetime_from_epoch(token['exp']))
+        if timeout > 0:
+            await django_cache.aset(self._key(token[api_settings.JTI_CLAIM]), 1, timeout=timeout)
+
+    async def ais_blacklisted(self, token) -> bool:
+        return await django_cache.ahas_key(self._key(token[api_settings.JTI_CLAIM]))
+
+    @staticmethod
+    def _timeout(expires_at):
+        return int((expires_at - aware_utcnow()).total_seconds()) + 1
+
+    @staticmethod
+    def _key(jti):
+        return settings.TOKEN_BLACKLIST_CACHE_KEY.format(jti=jti)
+
+
+@cache
+def get_token_blacklist() -> BaseTokenBlacklist:
+    return import_string(settings.TOKEN_BLACKLIST_BACKEND)()
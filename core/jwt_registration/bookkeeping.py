@@ -0,0 +1,72 @@
+import atexit
+import os
+import threading
+from functools import cache
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+from loguru import logger
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+
+class OutstandingTokenBuffer:
+
+    def __init__(self, flush_interval: float, batch_size: int):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._tokens = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pid = None
+
+    def add(self, user, token):
+        outstanding_token = OutstandingToken(
+            user_id=user.pk,
+            jti=token[api_settings.JTI_CLAIM],
+            token=str(token),
+            created_at=token.current_time,
+            expires_at=datetime_from_epoch(token['exp']),
+        )
+        with self._lock:
+            self._ensure_flusher()
+            self._tokens.append(outstanding_token)
+            full = len(self._tokens) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        with self._lock:
+            tokens, self._tokens = self._tokens, []
+        if not tokens:
+            return 0
+        try:
+            OutstandingToken.objects.bulk_create(tokens, batch_size=self.batch_size, ignore_conflicts=True)
+        except DatabaseError as e:
+            logger.error(f'Dropped {len(tokens)} outstanding tokens, they stay valid until expiry: {e}')
+            return 0
+        return len(tokens)
+
+    def _ensure_flusher(self):
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        threading.Thread(target=self._run, name='outstanding-token-flusher', daemon=True).start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            close_old_connections()
+            self.flush()
+
+
+@cache
+def get_outstanding_token_buffer() -> OutstandingTokenBuffer:
+    buffer = OutstandingTokenBuffer(
+        flush_interval=settings.TOKEN_BOOKKEEPING_FLUSH_INTERVAL,
+        batch_size=settings.TOKEN_BOOKKEEPING_BATCH_SIZE,
+    )
+    atexit.register(buffer.flush)
+    return buffer
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher, ScryptPasswordHasher
+
+
+class CalibratedHasherMixin:
+
+    def __init__(self):
+        params = settings.PASSWORD_HASHERS_PROFILE.get('params', {}).get(self.algorithm, {})
+        for name, value in params.items():
+            setattr(self, name, value)
+
+
+class CalibratedPBKDF2PasswordHasher(CalibratedHasherMixin, PBKDF2PasswordHasher):
+    pass
+
+
+class CalibratedScryptPasswordHasher(CalibratedHasherMixin, ScryptPasswordHasher):
+    pass
+
+
+class CalibratedArgon2PasswordHasher(CalibratedHasherMixin, Argon2PasswordHasher):
+    pass
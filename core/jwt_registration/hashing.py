@@ -0,0 +1,125 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import cache
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+from core.exeptions import PasswordHashingUnavailable
+from core.metrics import (
+    PASSWORD_HASHING_SECONDS, PASSWORD_HASHING_BUSY_WORKERS, PASSWORD_HASHING_QUEUED_JOBS, PASSWORD_HASHING_REJECTED
+)
+from user_profile.models import User
+
+
+class PasswordHashingPool:
+
+    def __init__(self, max_workers: int, max_queue: int, timeout: float):
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='password-hashing')
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+
+    def run(self, operation: str, func, *args):
+        future = self._submit(operation, func, *args)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            self._reject_timed_out(future)
+
+    async def arun(self, operation: str, func, *args):
+        future = self._submit(operation, func, *args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            self._reject_timed_out(future)
+
+    def _submit(self, operation, func, *args):
+        if not self._slots.acquire(blocking=False):
+            PASSWORD_HASHING_REJECTED.labels(reason='saturated').inc()
+            raise PasswordHashingUnavailable()
+
+        PASSWORD_HASHING_QUEUED_JOBS.inc()
+        future = self._executor.submit(self._execute, operation, func, *args)
+        future.add_done_callback(self._release)
+        return future
+
+    @staticmethod
+    def _reject_timed_out(future):
+        future.cancel()
+        PASSWORD_HASHING_REJECTED.labels(reason='timeout').inc()
+        raise PasswordHashingUnavailable()
+
+    @staticmethod
+    def _execute(operation, func, *args):
+        PASSWORD_HASHING_QUEUED_JOBS.dec()
+        PASSWORD_HASHING_BUSY_WORKERS.inc()
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            PASSWORD_HASHING_SECONDS.labels(operation=operation).observe(time.perf_counter() - start)
+            PASSWORD_HASHING_BUSY_WORKERS.dec()
+
+    def _release(self, future):
+        if future.cancelled():
+            PASSWORD_HASHING_QUEUED_JOBS.dec()
+        self._slots.release()
+
+
+@cache
+def get_hashing_pool() -> PasswordHashingPool:
+    return PasswordHashingPool(
+        max_workers=settings.PASSWORD_HASHING_WORKERS,
+        max_queue=settings.PASSWORD_HASHING_QUEUE_SIZE,
+        timeout=settings.PASSWORD_HASHING_TIMEOUT,
+    )
+
+
+def hash_password(raw_password):
+    return get_hashing_pool().run('hash', make_password, raw_password)
+
+
+def check_user_password(user, raw_password):
+    outdated = []
+    is_correct = get_hashing_pool().run('verify', check_password, raw_password, user.password, outdated.append)
+    if outdated:
+        user.password = hash_password(raw_password)
+        user.save(update_fields=['password'])
+    return is_correct
+
+
+def authenticate_user(email, password):
+    try:
+        user = User._default_manager.get_by_natural_key(email)
+    except User.DoesNotExist:
+        hash_password(password)
+        return None
+    if check_user_password(user, password) and user.is_active:
+        return user
+    return None
+
+
+async def ahash_password(raw_password):
+    return await get_hashing_pool().arun('hash', make_password, raw_password)
+
+
+async def acheck_user_password(user, raw_password):
+    outdated = []
+    is_correct = await get_hashing_pool().arun('verify', check_password, raw_password, user.password, outdated.append)
+    if outdated:
+        user.password = await ahash_password(raw_password)
+        await user.asave(update_fields=['password'])
+    return is_correct
+
+
+async def aauthenticate_user(email, password):
+    try:
+        user = await User._default_manager.aget(**{User.USERNAME_FIELD: email})
+    except User.DoesNotExist:
+        await ahash_password(password)
+        return None
+    if await acheck_user_password(user, password) and user.is_active:
+        return user
+    return None
@@ -0,0 +1,91 @@
+import functools
+import json
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.crypto import salted_hmac
+from loguru import logger
+from redis import RedisError
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from core.exeptions import IdempotencyKeyReused, RegistrationInProgress
+from core.redis_client import get_redis_client, make_redis_key
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+# KEYS: lock key; ARGV: owner. Deletes the lock only while it is still held by the owner, so a lock that expired
+# and was taken by another request is left alone.
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def get_idempotency_key(request):
+    key = request.headers.get('Idempotency-Key')
+    if key is not None and not 0 < len(key) <= IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise ValidationError({'error': f'Idempotency-Key must be 1 to {IDEMPOTENCY_KEY_MAX_LENGTH} characters'})
+    return key
+
+
+def request_fingerprint(data):
+    if hasattr(data, 'dict'):
+        data = data.dict()
+    # The body carries the plaintext password and the fingerprint sits in Redis next to the email, so it is keyed
+    # with SECRET_KEY rather than a bare hash that could be brute-forced from a dump.
+    return salted_hmac(
+        'jwt_registration.idempotency.request_fingerprint',
+        json.dumps(data, sort_keys=True, default=str),
+        algorithm='sha256',
+    ).hexdigest()
+
+
+def get_stored_response(key, fingerprint):
+    stored = cache.get(settings.REGISTRATION_IDEMPOTENCY_CACHE_KEY.format(key=key))
+    if stored is None:
+        return None
+    if stored['fingerprint'] != fingerprint:
+        raise IdempotencyKeyReused()
+    return Response(stored['data'], status=stored['status'], headers={'Idempotent-Replayed': 'true'})
+
+
+def store_response(key, fingerprint, response):
+    cache.set(
+        settings.REGISTRATION_IDEMPOTENCY_CACHE_KEY.format(key=key),
+        {'fingerprint': fingerprint, 'status': response.status_code, 'data': response.data},
+        timeout=settings.REGISTRATION_IDEMPOTENCY_TTL,
+    )
+
+
+@contextmanager
+def email_lock(email):
+    if not isinstance(email, str) or not email.strip():
+        yield
+        return
+
+    client = get_redis_client()
+    key = make_redis_key(settings.REGISTRATION_LOCK_CACHE_KEY.format(email=email.strip().lower()))
+    owner = uuid.uuid4().hex
+    deadline = time.monotonic() + settings.REGISTRATION_LOCK_WAIT
+    while not client.set(key, owner, nx=True, ex=settings.REGISTRATION_LOCK_TIMEOUT):
+        if time.monotonic() >= deadline:
+            raise RegistrationInProgress()
+        time.sleep(settings.REGISTRATION_LOCK_POLL)
+    try:
+        yield
+    finally:
+        try:
+            _release_lock_script()(keys=[key], args=[owner])
+        except RedisError as e:
+            logger.error(f'Registration lock was not released, it expires on its own: {e}')
+
+
+@functools.cache
+def _release_lock_script():
+    return get_redis_client().register_script(RELEASE_LOCK_SCRIPT)
@@ -0,0 +1,97 @@
+import json
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from loguru import logger
+
+from core.metrics import EMAIL_BATCH_SECONDS, EMAIL_BATCH_THROUGHPUT, EMAILS_PROCESSED
+from core.redis_client import get_redis_client, make_redis_key
+
+SENT, REJECTED, FAILED = 'sent', 'rejected', 'failed'
+
+
+class PooledEmailSender:
+
+    def __init__(self, reconnect_attempts: int):
+        self.reconnect_attempts = reconnect_attempts
+        self.connection = get_connection(fail_silently=False)
+
+    def send(self, email_message) -> str:
+        for _ in range(self.reconnect_attempts + 1):
+            try:
+                self.connection.open()
+                self.connection.send_messages([email_message])
+                return SENT
+            except smtplib.SMTPRecipientsRefused as e:
+                logger.error(f'Recipients refused, dropping email: {e.recipients}')
+                return REJECTED
+            except (smtplib.SMTPException, OSError) as e:
+                logger.warning(f'SMTP connection failed, reconnecting: {e!r}')
+                self.close()
+        return FAILED
+
+    def close(self):
+        try:
+            self.connection.close()
+        except (smtplib.SMTPException, OSError):
+            pass
+
+
+@cache
+def get_email_sender() -> PooledEmailSender:
+    return PooledEmailSender(reconnect_attempts=settings.EMAIL_RECONNECT_ATTEMPTS)
+
+
+@cache
+def get_email_dispatch_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=settings.EMAIL_DISPATCH_WORKERS, thread_name_prefix='email-dispatch')
+
+
+def enqueue_email(subject, message, recipient):
+    get_redis_client().rpush(
+        make_redis_key(settings.EMAIL_QUEUE_CACHE_KEY),
+        json.dumps({'subject': subject, 'message': message, 'recipient': recipient}),
+    )
+
+
+def send_queued_emails(batch_size: int) -> int:
+    client = get_redis_client()
+    queue_key = make_redis_key(settings.EMAIL_QUEUE_CACHE_KEY)
+    sender = get_email_sender()
+    sent = 0
+
+    while batch := client.lpop(queue_key, batch_size):
+        start = time.perf_counter()
+        results = {SENT: 0, REJECTED: 0, FAILED: 0}
+        failed = []
+        for item in batch:
+            data = json.loads(item)
+            email_message = EmailMessage(
+                subject=data['subject'],
+                body=data['message'],
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[data['recipient']],
+            )
+            result = sender.send(email_message)
+            results[result] += 1
+            if result == FAILED:
+                failed.append(item)
+
+        elapsed = time.perf_counter() - start
+        for result, count in results.items():
+            EMAILS_PROCESSED.labels(result=result).inc(count)
+        EMAIL_BATCH_SECONDS.observe(elapsed)
+        EMAIL_BATCH_THROUGHPUT.set(results[SENT] / elapsed if elapsed else 0)
+        logger.info(f'Sent {results[SENT]}/{len(batch)} emails in {elapsed:.2f}s '
+                    f'({results[SENT] / elapsed if elapsed else 0:.1f}/s)')
+        sent += results[SENT]
+
+        if failed:
+            client.rpush(queue_key, *failed)
+            logger.error(f'SMTP server is unavailable, {len(failed)} emails returned to the queue')
+            break
+    return sent
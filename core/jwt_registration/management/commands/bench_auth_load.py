@@ -0,0 +1,102 @@
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import urljoin, urlsplit
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.tokens import AccessToken
+
+from user_profile.models import User
+
+
+class Command(BaseCommand):
+    help = ('Hold many concurrent slow clients against the same auth views served by the sync (WSGI) '
+            'and the async (ASGI) server and compare them')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sync-base', default='http://web-app:8002/account/api/v1/async/')
+        parser.add_argument('--async-base', default='http://web-app-asgi:8001/account/api/v1/async/')
+        parser.add_argument('--endpoints', nargs='+', choices=('login', 'validate'), default=['login', 'validate'])
+        parser.add_argument('--concurrency', type=int, default=1000)
+        parser.add_argument('--requests', type=int, default=5000)
+        parser.add_argument('--client-delay', type=float, default=0.5,
+                            help='Seconds a client waits between sending headers and body')
+        parser.add_argument('--users', type=int, default=1000,
+                            help='Login accounts to spread the requests over, so the per-email limiter stays quiet')
+        parser.add_argument('--password', default='bench-load-password')
+
+    def handle(self, *args, **options):
+        emails = self._ensure_users(options['users'], options['password']) if 'login' in options['endpoints'] else []
+        token = AccessToken()
+        token['user_id'] = 0
+
+        for endpoint in options['endpoints']:
+            if endpoint == 'login':
+                path = 'login/'
+                build = lambda i: ({}, {'email': emails[i % len(emails)], 'password': options['password']})
+            else:
+                path = 'token/validate/'
+                build = lambda i: ({'Authorization': f'Bearer {token}'}, {})
+            for mode in ('sync', 'async'):
+                url = urljoin(options[f'{mode}_base'], path)
+                elapsed, timings, errors = asyncio.run(self._run(url, build, options))
+                timings = sorted(timings) or [0]
+                self.stdout.write(
+                    f'{endpoint:<8} {mode:<6} {len(timings) / elapsed:8.1f} req/s  '
+                    f'p50={statistics.median(timings):8.1f}ms  '
+                    f'p99={timings[max(int(len(timings) * 0.99) - 1, 0)]:8.1f}ms  errors={errors}'
+                )
+
+    @staticmethod
+    def _ensure_users(count, password):
+        emails = [f'bench-load-{i}@example.com' for i in range(count)]
+        existing = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+        encoded = make_password(password)
+        User.objects.bulk_create(
+            User(email=email, password=encoded, first_name='bench', last_name='load')
+            for email in emails if email not in existing
+        )
+        return emails
+
+    async def _run(self, url, build, options):
+        parts = urlsplit(url)
+        semaphore = asyncio.Semaphore(options['concurrency'])
+
+        async def request(i):
+            headers, data = build(i)
+            body = json.dumps(data).encode()
+            # Every client gets its own address so the per-IP login limiter does not turn the run into 429s.
+            head = ''.join([
+                f'POST {parts.path} HTTP/1.1\r\n',
+                f'Host: {parts.hostname}\r\n',
+                f'X-Forwarded-For: 10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}\r\n',
+                *(f'{name}: {value}\r\n' for name, value in headers.items()),
+                'Content-Type: application/json\r\n',
+                f'Content-Length: {len(body)}\r\n',
+                'Connection: close\r\n\r\n',
+            ]).encode()
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+                    writer.write(head)
+                    await writer.drain()
+                    await asyncio.sleep(options['client_delay'])
+                    writer.write(body)
+                    await writer.drain()
+                    status_line = await reader.readline()
+                    await reader.read()
+                    writer.close()
+                except OSError:
+                    return None
+                if not status_line.split(b' ')[1:2] == [b'200']:
+                    return None
+                return (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(request(i) for i in range(options['requests'])))
+        elapsed = time.perf_counter() - start
+        timings = [result for result in results if result is not None]
+        return elapsed, timings, len(results) - len(timings)
@@ -0,0 +1,50 @@
+import statistics
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.benchmarking import measure
+from jwt_registration.signing import KeyedTokenBackend, SigningKeySet
+
+PRIVATE_KEY_FACTORIES = {
+    'RS256': lambda: rsa.generate_private_key(public_exponent=65537, key_size=2048),
+    'ES256': lambda: ec.generate_private_key(ec.SECP256R1()),
+    'EdDSA': ed25519.Ed25519PrivateKey.generate,
+}
+
+
+class Command(BaseCommand):
+    help = 'Measure token sign and verify cost per algorithm and what it adds to login and token refresh'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--algorithms', nargs='+', default=['HS256', 'RS256', 'ES256', 'EdDSA'],
+                            choices=['HS256', *PRIVATE_KEY_FACTORIES])
+        parser.add_argument('--iterations', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        refresh = RefreshToken()
+        refresh.payload.update({'user_id': 1, 'email': 'bench@example.com'})
+        payloads = [refresh.payload, refresh.access_token.payload]
+
+        self.stdout.write(f'{"algorithm":<10} {"sign":>10} {"verify":>10} {"sign/s":>10} {"verify/s":>10} '
+                          f'{"login":>10} {"refresh":>10}')
+        for algorithm in options['algorithms']:
+            backend = KeyedTokenBackend(SigningKeySet(algorithm, self._signing_key(algorithm)))
+            tokens = [backend.encode(payload) for payload in payloads]
+            sign = statistics.median(measure(lambda: backend.encode(payloads[0]), options['iterations']))
+            verify = statistics.median(measure(lambda: backend.decode(tokens[0]), options['iterations']))
+            # LoginAPIView signs a refresh and an access token; TokenRefreshView with rotation
+            # verifies the refresh token and signs a new pair.
+            self.stdout.write(
+                f'{algorithm:<10} {sign:8.1f}us {verify:8.1f}us {1_000_000 / sign:10.0f} {1_000_000 / verify:10.0f} '
+                f'{2 * sign:8.1f}us {verify + 2 * sign:8.1f}us'
+            )
+
+    @staticmethod
+    def _signing_key(algorithm):
+        if algorithm == 'HS256':
+            return 'bench-secret-key-with-enough-entropy-for-hs256'
+        return PRIVATE_KEY_FACTORIES[algorithm]().private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
@@ -0,0 +1,42 @@
+import statistics
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.benchmarking import measure, report
+from jwt_registration.token_validation import FastTokenValidateApplication
+
+
+class Command(BaseCommand):
+    help = 'Compare TokenVerifyView with the in-process fast validation path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        token = AccessToken()
+        token['user_id'] = 0
+
+        client = Client(HTTP_HOST='localhost')
+        verify_url = reverse('token_verify')
+        verify = measure(
+            lambda: client.post(verify_url, {'token': str(token)}, content_type='application/json'),
+            iterations
+        )
+
+        application = FastTokenValidateApplication(lambda environ, start_response: [])
+        environ = {
+            'PATH_INFO': settings.FAST_TOKEN_VALIDATE_PATH,
+            'HTTP_AUTHORIZATION': f'Bearer {token}',
+        }
+        setup_testing_defaults(environ)
+        fast = measure(lambda: application(environ, lambda status, headers: None), iterations)
+
+        report(self.stdout, 'TokenVerifyView', verify, width=16)
+        report(self.stdout, 'fast-validate', fast, width=16)
+        self.stdout.write(f'speedup (mean): {statistics.mean(verify) / statistics.mean(fast):.1f}x')
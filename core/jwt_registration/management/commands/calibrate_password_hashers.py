@@ -0,0 +1,138 @@
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher, PBKDF2PasswordHasher, ScryptPasswordHasher, get_hasher
+)
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+CALIBRATED_HASHERS = {
+    'pbkdf2_sha256': (PBKDF2PasswordHasher, 'jwt_registration.hashers.CalibratedPBKDF2PasswordHasher'),
+    'scrypt': (ScryptPasswordHasher, 'jwt_registration.hashers.CalibratedScryptPasswordHasher'),
+    'argon2': (Argon2PasswordHasher, 'jwt_registration.hashers.CalibratedArgon2PasswordHasher'),
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the password hashers on this machine and recommend parameters for a login latency budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target-ms', type=float, default=250,
+                            help='Latency budget for a single password hash')
+        parser.add_argument('--samples', type=int, default=3)
+        parser.add_argument('--pbkdf2-iterations', type=int, nargs='+',
+                            default=[390_000, 600_000, 720_000, 870_000, 1_000_000])
+        parser.add_argument('--min-pbkdf2-iterations', type=int, default=600_000)
+        parser.add_argument('--scrypt-work-factors', type=int, nargs='+', default=[2 ** 14, 2 ** 15, 2 ** 16])
+        parser.add_argument('--argon2-time-costs', type=int, nargs='+', default=[2, 3, 4])
+        parser.add_argument('--algorithm', choices=CALIBRATED_HASHERS,
+                            help='Algorithm to prefer in the written profile, the current default otherwise')
+        parser.add_argument('--write', action='store_true',
+                            help='Write the recommended profile to PASSWORD_HASHERS_PROFILE_PATH')
+        parser.add_argument('--output', help='Write the recommended profile to this path instead')
+
+    def handle(self, *args, **options):
+        self.samples = options['samples']
+        target = options['target_ms']
+
+        results = {
+            'pbkdf2_sha256': self._benchmark_pbkdf2(options['pbkdf2_iterations']),
+            'scrypt': self._benchmark_scrypt(options['scrypt_work_factors']),
+        }
+        if self._argon2_available():
+            results['argon2'] = self._benchmark_argon2(options['argon2_time_costs'])
+        else:
+            self.stdout.write('argon2: skipped, argon2-cffi is not installed')
+
+        recommendations = {}
+        for algorithm, timings in results.items():
+            for params, elapsed in timings:
+                self.stdout.write(f'{algorithm:<14} {self._format(params):<40} {elapsed:8.1f} ms')
+            recommendations[algorithm] = self._recommend(algorithm, timings, target, options)
+
+        self.stdout.write(f'\nRecommended parameters for a {target:.0f} ms budget:')
+        for algorithm, (params, elapsed) in recommendations.items():
+            self.stdout.write(f'{algorithm:<14} {self._format(params):<40} {elapsed:8.1f} ms')
+
+        algorithm = options['algorithm'] or get_hasher('default').algorithm
+        if algorithm not in recommendations:
+            raise CommandError(f'No benchmark results for {algorithm}')
+
+        path = options['output'] or (settings.PASSWORD_HASHERS_PROFILE_PATH if options['write'] else None)
+        if path:
+            profile = self._build_profile(algorithm, recommendations)
+            with open(path, 'w') as file:
+                json.dump(profile, file, indent=4)
+            self.stdout.write(f'Profile preferring {algorithm} written to {path}')
+
+    def _benchmark_pbkdf2(self, iterations):
+        return [
+            ({'iterations': count}, self._measure(PBKDF2PasswordHasher(), iterations=count))
+            for count in sorted(iterations)
+        ]
+
+    def _benchmark_scrypt(self, work_factors):
+        timings = []
+        for work_factor in sorted(work_factors):
+            hasher = ScryptPasswordHasher()
+            hasher.work_factor = work_factor
+            hasher.maxmem = 2 * 128 * work_factor * hasher.block_size
+            timings.append(({'work_factor': work_factor, 'maxmem': hasher.maxmem}, self._measure(hasher)))
+        return timings
+
+    def _benchmark_argon2(self, time_costs):
+        timings = []
+        for time_cost in sorted(time_costs):
+            hasher = Argon2PasswordHasher()
+            hasher.time_cost = time_cost
+            timings.append(({'time_cost': time_cost}, self._measure(hasher)))
+        return timings
+
+    def _measure(self, hasher, **kwargs):
+        salt = hasher.salt()
+        hasher.encode('calibration-password', salt, **kwargs)
+        timings = []
+        for _ in range(self.samples):
+            start = time.perf_counter()
+            hasher.encode('calibration-password', salt, **kwargs)
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    def _recommend(self, algorithm, timings, target, options):
+        if algorithm == 'pbkdf2_sha256':
+            acceptable = [item for item in timings if item[0]['iterations'] >= options['min_pbkdf2_iterations']]
+            timings = acceptable or timings[-1:]
+        within_budget = [item for item in timings if item[1] <= target]
+        if within_budget:
+            return within_budget[-1]
+        self.stderr.write(f'{algorithm}: no benchmarked parameters fit the {target:.0f} ms budget')
+        return timings[0]
+
+    @staticmethod
+    def _build_profile(algorithm, recommendations):
+        base_class, calibrated_path = CALIBRATED_HASHERS[algorithm]
+        base_path = f'{base_class.__module__}.{base_class.__name__}'
+        fallbacks = [
+            path for path in settings.PASSWORD_HASHERS
+            if path not in (base_path, calibrated_path)
+            and import_string(path).algorithm != algorithm
+        ]
+        return {
+            'hashers': [calibrated_path, *fallbacks],
+            'params': {name: params for name, (params, _) in recommendations.items()},
+        }
+
+    @staticmethod
+    def _argon2_available():
+        try:
+            import argon2  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    @staticmethod
+    def _format(params):
+        return ', '.join(f'{name}={value}' for name, value in params.items())
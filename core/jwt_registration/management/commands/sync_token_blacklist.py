@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from jwt_registration.blacklist import RedisTokenBlacklist
+
+
+class Command(BaseCommand):
+    help = 'Copy unexpired tokens from the Postgres blacklist into the Redis blacklist'
+
+    def handle(self, *args, **options):
+        redis_blacklist = RedisTokenBlacklist()
+        blacklisted = BlacklistedToken.objects.filter(
+            token__expires_at__gt=aware_utcnow()
+        ).values_list('token__jti', 'token__expires_at')
+
+        count = 0
+        for jti, expires_at in blacklisted.iterator():
+            redis_blacklist.blacklist_jti(jti, expires_at)
+            count += 1
+        self.stdout.write(f'{count} blacklisted tokens copied to Redis')
@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('token_blacklist', '0012_alter_outstandingtoken_user'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql='CREATE INDEX CONCURRENTLY IF NOT EXISTS token_blacklist_outstandingtoken_expires_at_idx '
+                'ON token_blacklist_outstandingtoken (expires_at);',
+            reverse_sql='DROP INDEX CONCURRENTLY IF EXISTS token_blacklist_outstandingtoken_expires_at_idx;',
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class OutboxMessage(models.Model):
+    class StatusChoices(models.TextChoices):
+        PENDING = 'pending', _('Pending')
+        PROCESSING = 'processing', _('Processing')
+        FAILED = 'failed', _('Failed')
+
+    payload = models.JSONField(help_text=_('data sent to the other services'))
+    self_package = models.JSONField(help_text=_('create, confirm and rollback paths per service'))
+    status = models.CharField(max_length=16, choices=StatusChoices.choices, default=StatusChoices.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    available_at = models.DateTimeField(
+        default=timezone.now,
+        help_text=_('next retry for pending messages, lease expiry for processing ones')
+    )
+
+    class Meta:
+        verbose_name = _('Outbox message')
+        verbose_name_plural = _('Outbox messages')
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='outbox_status_available_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.status} {self.payload}'
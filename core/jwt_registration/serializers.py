@@ -1,5 +1,11 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import UntypedToken
 
+from jwt_registration.blacklist import get_token_blacklist
+from jwt_registration.hashing import hash_password
+from jwt_registration.tokens import RefreshToken
 from user_profile.models import User, Customization
 
 
@@ -36,7 +42,7 @@ class UserImportantSerializer(serializers.ModelSerializer):
             first_name=validated_data['first_name'],
             last_name=validated_data['last_name']
         )
-        user.set_password(validated_data['password'])
+        user.password = hash_password(validated_data['password'])
         user.save()
         Customization.objects.create(user=user)
         return user
@@ -44,6 +50,20 @@ class UserImportantSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         instance.email = validated_data.get('email', instance.email)
         if validated_data.get('password'):
-            instance.set_password(validated_data['password'])
+            instance.password = hash_password(validated_data['password'])
         instance.save()
         return instance
+
+
+class BlacklistTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = RefreshToken
+
+
+class BlacklistTokenVerifySerializer(serializers.Serializer):
+    token = serializers.CharField(write_only=True)
+
+    def validate(self, attrs):
+        token = UntypedToken(attrs['token'])
+        if api_settings.BLACKLIST_AFTER_ROTATION and get_token_blacklist().is_blacklisted(token):
+            raise serializers.ValidationError('Token is blacklisted')
+        return {}
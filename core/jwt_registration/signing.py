@@ -0,0 +1,132 @@
+import base64
+import hashlib
+import json
+from functools import cache
+
+import jwt
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from jwt.algorithms import get_default_algorithms, requires_cryptography
+from rest_framework_simplejwt.backends import ALLOWED_ALGORITHMS, TokenBackend
+from rest_framework_simplejwt.exceptions import TokenBackendError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import format_lazy
+
+SUPPORTED_ALGORITHMS = ALLOWED_ALGORITHMS | {'EdDSA'}
+
+# RFC 7638: members of the public JWK that take part in the thumbprint, per key type
+THUMBPRINT_MEMBERS = {
+    'RSA': ('e', 'kty', 'n'),
+    'EC': ('crv', 'kty', 'x', 'y'),
+    'OKP': ('crv', 'kty', 'x'),
+}
+
+
+class SigningKeySet:
+
+    def __init__(self, algorithm: str, signing_key, retired_verifying_keys=()):
+        if algorithm not in SUPPORTED_ALGORITHMS:
+            raise TokenBackendError(format_lazy(_("Unrecognized algorithm type '{}'"), algorithm))
+        self.algorithm = algorithm
+        self._algorithm = get_default_algorithms()[algorithm]
+        self.signing_key = self._algorithm.prepare_key(signing_key)
+
+        if self.symmetric:
+            self.key_id = None
+            self.verifying_keys = {None: self.signing_key}
+            return
+
+        public_keys = [self.signing_key.public_key()]
+        public_keys += [self._algorithm.prepare_key(key) for key in retired_verifying_keys]
+        self.verifying_keys = {self.thumbprint(key): key for key in public_keys}
+        self.key_id = next(iter(self.verifying_keys))
+
+    @property
+    def symmetric(self) -> bool:
+        return self.algorithm not in requires_cryptography
+
+    def verifying_key(self, token):
+        if self.symmetric:
+            return self.signing_key
+        try:
+            key_id = jwt.get_unverified_header(token).get('kid')
+        except jwt.InvalidTokenError:
+            return None
+        return self.verifying_keys.get(key_id)
+
+    def thumbprint(self, key) -> str:
+        jwk = self._algorithm.to_jwk(key, as_dict=True)
+        members = {name: jwk[name] for name in THUMBPRINT_MEMBERS[jwk['kty']]}
+        digest = hashlib.sha256(json.dumps(members, separators=(',', ':'), sort_keys=True).encode()).digest()
+        return base64.urlsafe_b64encode(digest).rstrip(b'=').decode()
+
+    def jwks(self) -> dict:
+        if self.symmetric:
+            return {'keys': []}
+        return {'keys': [
+            {**self._algorithm.to_jwk(key, as_dict=True), 'kid': key_id, 'use': 'sig', 'alg': self.algorithm}
+            for key_id, key in self.verifying_keys.items()
+        ]}
+
+
+class KeyedTokenBackend(TokenBackend):
+
+    def __init__(self, keyset: SigningKeySet, **kwargs):
+        self.keyset = keyset
+        super().__init__(keyset.algorithm, keyset.signing_key, **kwargs)
+
+    def _validate_algorithm(self, algorithm):
+        if algorithm not in SUPPORTED_ALGORITHMS:
+            raise TokenBackendError(format_lazy(_("Unrecognized algorithm type '{}'"), algorithm))
+
+    def get_verifying_key(self, token):
+        key = self.keyset.verifying_key(token)
+        if key is None:
+            raise TokenBackendError(_('Token is invalid or expired'))
+        return key
+
+    def encode(self, payload):
+        jwt_payload = payload.copy()
+        if self.audience is not None:
+            jwt_payload['aud'] = self.audience
+        if self.issuer is not None:
+            jwt_payload['iss'] = self.issuer
+        return jwt.encode(
+            jwt_payload,
+            self.signing_key,
+            algorithm=self.algorithm,
+            headers={'kid': self.keyset.key_id} if self.keyset.key_id else None,
+            json_encoder=self.json_encoder,
+        )
+
+
+def _read_key(path):
+    with open(path, 'rb') as file:
+        return file.read()
+
+
+@cache
+def get_signing_keyset() -> SigningKeySet:
+    if api_settings.ALGORITHM.startswith('HS'):
+        return SigningKeySet(api_settings.ALGORITHM, api_settings.SIGNING_KEY)
+    return SigningKeySet(
+        api_settings.ALGORITHM,
+        _read_key(settings.JWT_PRIVATE_KEY_PATH),
+        [_read_key(path) for path in settings.JWT_RETIRED_PUBLIC_KEY_PATHS],
+    )
+
+
+@cache
+def get_token_backend() -> KeyedTokenBackend:
+    return KeyedTokenBackend(
+        get_signing_keyset(),
+        audience=api_settings.AUDIENCE,
+        issuer=api_settings.ISSUER,
+        leeway=api_settings.LEEWAY,
+        json_encoder=api_settings.JSON_ENCODER,
+    )
+
+
+@cache
+def get_jwks_body() -> bytes:
+    return json.dumps(get_signing_keyset().jwks()).encode()
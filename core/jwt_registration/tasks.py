@@ -1,12 +1,131 @@
+import time
+from datetime import timedelta
+
 from celery import shared_task
-from django.core.mail import send_mail
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+from loguru import logger
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from jwt_registration.mailing import enqueue_email, get_email_dispatch_executor, send_queued_emails
+from jwt_registration.models import OutboxMessage
+from jwt_registration.utils import HeadTwoCommitsPattern, get_outbox_dispatch_executor
+
+
+@shared_task
+def dispatch_verification_emails(batch_size=None):
+    return send_queued_emails(batch_size or settings.EMAIL_BATCH_SIZE)
+
+
+def queue_verification_email(subject, message, recipient):
+    enqueue_email(subject, message, recipient)
+    if cache.add(settings.EMAIL_DISPATCH_SCHEDULED_CACHE_KEY, 1, timeout=settings.EMAIL_BATCH_DELAY):
+        # Eager tasks ignore a countdown and would drain the queue on the request thread, so the batching window
+        # is waited out in the background instead. Everything queued during it goes out with the same dispatch.
+        get_email_dispatch_executor().submit(_dispatch_after_batch_delay)
+
+
+def _dispatch_after_batch_delay():
+    time.sleep(settings.EMAIL_BATCH_DELAY)
+    try:
+        dispatch_verification_emails.delay()
+    except Exception as e:
+        logger.error(f"Queued emails were not dispatched, leaving them to the periodic dispatch: {e!r}")
+
+
+@shared_task
+def prune_expired_tokens(batch_size=None, pause=None):
+    batch_size = batch_size or settings.TOKEN_PRUNE_BATCH_SIZE
+    pause = settings.TOKEN_PRUNE_BATCH_PAUSE if pause is None else pause
+    now = aware_utcnow()
+    removed = {'outstanding': 0, 'blacklisted': 0}
+
+    while True:
+        batch = list(
+            OutstandingToken.objects.filter(expires_at__lte=now)
+            .order_by('expires_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not batch:
+            break
+        _, deleted = OutstandingToken.objects.filter(id__in=batch).delete()
+        removed['outstanding'] += deleted.get(OutstandingToken._meta.label, 0)
+        removed['blacklisted'] += deleted.get(BlacklistedToken._meta.label, 0)
+        if len(batch) < batch_size:
+            break
+        time.sleep(pause)
+
+    logger.info(f"Pruned {removed['outstanding']} outstanding and {removed['blacklisted']} blacklisted tokens")
+    return removed
+
+
+@shared_task
+def dispatch_outbox_message(message_id):
+    now = timezone.now()
+    claimed = OutboxMessage.objects.filter(
+        id=message_id,
+        status__in=(OutboxMessage.StatusChoices.PENDING, OutboxMessage.StatusChoices.PROCESSING),
+        available_at__lte=now,
+    ).update(
+        status=OutboxMessage.StatusChoices.PROCESSING,
+        available_at=now + timedelta(seconds=settings.OUTBOX_LEASE),
+        attempts=F('attempts') + 1,
+    )
+    if not claimed:
+        return
+    message = OutboxMessage.objects.get(id=message_id)
+
+    try:
+        HeadTwoCommitsPattern(data=message.payload, self_package=message.self_package).two_commits_operation()
+    except Exception as e:
+        message.last_error = repr(e)
+        if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            message.status = OutboxMessage.StatusChoices.FAILED
+            message.save(update_fields=['status', 'last_error'])
+            logger.error(f"Outbox message {message.id} failed after {message.attempts} attempts: {message.last_error}")
+            return
+
+        delay = min(settings.OUTBOX_RETRY_BASE * 2 ** (message.attempts - 1), settings.OUTBOX_RETRY_MAX)
+        message.status = OutboxMessage.StatusChoices.PENDING
+        message.available_at = timezone.now() + timedelta(seconds=delay)
+        message.save(update_fields=['status', 'available_at', 'last_error'])
+        logger.warning(f"Outbox message {message.id} attempt {message.attempts} failed, retrying in {delay}s")
+        dispatch_outbox_message.apply_async((message.id,), countdown=delay)
+        return
+
+    message.delete()
 
 
 @shared_task
-def send_verification_email(subject, message, from_email, recipient_list, auth_user, auth_password):
-    send_mail(subject=subject,
-              message=message,
-              from_email=from_email,
-              recipient_list=recipient_list,
-              auth_user=auth_user,
-              auth_password=auth_password)
+def dispatch_pending_outbox_messages(batch_size=None):
+    batch_size = batch_size or settings.OUTBOX_SWEEP_BATCH_SIZE
+    due = list(
+        OutboxMessage.objects.filter(
+            status__in=(OutboxMessage.StatusChoices.PENDING, OutboxMessage.StatusChoices.PROCESSING),
+            available_at__lte=timezone.now(),
+        )
+        .order_by('available_at')
+        .values_list('id', flat=True)[:batch_size]
+    )
+    for message_id in due:
+        dispatch_outbox_message.delay(message_id)
+    return len(due)
+
+
+def schedule_outbox_dispatch(message_id):
+    # Tasks run eagerly unless a worker is configured, so the first attempt is handed to a background thread
+    # instead of holding the request on the other services. Whatever it does not finish is left to the sweep.
+    return get_outbox_dispatch_executor().submit(_dispatch_in_background, message_id)
+
+
+def _dispatch_in_background(message_id):
+    try:
+        dispatch_outbox_message.delay(message_id)
+    except Exception as e:
+        logger.warning(f"Outbox message {message_id} was not dispatched, leaving it to the sweep: {e!r}")
+    finally:
+        connections.close_all()
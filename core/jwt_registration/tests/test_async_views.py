@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from jwt_registration.tokens import RefreshToken
+from user_profile.models import User
+
+
+class AsyncAuthViewsTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='test@example.com', password='testpassword', first_name='first', last_name='last')
+        self.refresh = RefreshToken.for_user(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    async def test_login(self):
+        response = await self.async_client.post(
+            reverse('async_login'), {'email': 'test@example.com', 'password': 'testpassword'},
+            content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('access_token', response.json())
+        self.assertEqual(await OutstandingToken.objects.filter(user=self.user).acount(), 2)
+
+    async def test_login_invalid_data(self):
+        response = await self.async_client.post(
+            reverse('async_login'), {'email': 'test@example.com', 'password': 'wrong'},
+            content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = await self.async_client.post(reverse('async_login'), {}, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_refresh_rotates_and_blacklists(self):
+        url = reverse('async_token_refresh')
+        response = await self.async_client.post(url, {'refresh': str(self.refresh)}, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('refresh', response.json())
+
+        response = await self.async_client.post(url, {'refresh': str(self.refresh)}, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_logout(self):
+        response = await self.async_client.post(
+            reverse('async_logout'), {'refresh_token': str(self.refresh)}, content_type='application/json',
+            headers={'Authorization': f'Bearer {self.refresh.access_token}'})
+        self.assertEqual(response.status_code, status.HTTP_205_RESET_CONTENT)
+
+        response = await self.async_client.post(
+            reverse('async_logout'), {'refresh_token': str(self.refresh)}, content_type='application/json',
+            headers={'Authorization': f'Bearer {self.refresh.access_token}'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_logout_without_access_token(self):
+        response = await self.async_client.post(
+            reverse('async_logout'), {'refresh_token': str(self.refresh)}, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_validate_token(self):
+        response = await self.async_client.get(
+            reverse('async_token_validate'), headers={'Authorization': f'Bearer {self.refresh.access_token}'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = await self.async_client.get(reverse('async_token_validate'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
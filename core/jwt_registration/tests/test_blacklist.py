@@ -0,0 +1,60 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from jwt_registration.blacklist import DatabaseTokenBlacklist, RedisTokenBlacklist, get_token_blacklist
+from jwt_registration.tokens import RefreshToken
+from user_profile.models import User
+
+
+class TokenBlacklistTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='test@example.com', password='testpassword', first_name='first', last_name='last')
+        self.token = RefreshToken.for_user(self.user)
+
+    def tearDown(self):
+        cache.clear()
+        get_token_blacklist.cache_clear()
+
+    def test_redis_blacklist(self):
+        blacklist = RedisTokenBlacklist()
+        self.assertFalse(blacklist.is_blacklisted(self.token))
+        with self.assertNumQueries(0):
+            blacklist.blacklist(self.token)
+            self.assertTrue(blacklist.is_blacklisted(self.token))
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+    @patch('jwt_registration.blacklist.django_cache')
+    def test_redis_blacklist_expires_with_token(self, mock_cache):
+        RedisTokenBlacklist().blacklist(self.token)
+        timeout = mock_cache.set.call_args.kwargs['timeout']
+        self.assertAlmostEqual(timeout, timedelta(days=90).total_seconds(), delta=5)
+
+    @patch('jwt_registration.blacklist.django_cache')
+    def test_redis_blacklist_skips_expired_token(self, mock_cache):
+        self.token.set_exp(lifetime=-timedelta(seconds=5))
+        RedisTokenBlacklist().blacklist(self.token)
+        mock_cache.set.assert_not_called()
+
+    def test_database_blacklist(self):
+        blacklist = DatabaseTokenBlacklist()
+        self.assertFalse(blacklist.is_blacklisted(self.token))
+        blacklist.blacklist(self.token)
+        self.assertTrue(blacklist.is_blacklisted(self.token))
+        self.assertTrue(BlacklistedToken.objects.filter(token__jti=self.token['jti']).exists())
+
+    @override_settings(TOKEN_BLACKLIST_BACKEND='jwt_registration.blacklist.DatabaseTokenBlacklist')
+    def test_backend_is_selectable(self):
+        get_token_blacklist.cache_clear()
+        self.assertIsInstance(get_token_blacklist(), DatabaseTokenBlacklist)
+
+    def test_blacklisted_token_is_rejected(self):
+        self.token.blacklist()
+        with self.assertRaises(TokenError):
+            RefreshToken(str(self.token))
@@ -0,0 +1,67 @@
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from jwt_registration.blacklist import DatabaseTokenBlacklist
+from jwt_registration.bookkeeping import OutstandingTokenBuffer
+from jwt_registration.tokens import RefreshToken
+from user_profile.models import User
+
+
+@override_settings(TOKEN_BOOKKEEPING='buffered')
+class OutstandingTokenBufferTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='test@example.com', password='testpassword', first_name='first', last_name='last')
+        self.buffer = OutstandingTokenBuffer(flush_interval=60, batch_size=3)
+        for patcher in (
+            patch('jwt_registration.tokens.get_outstanding_token_buffer', return_value=self.buffer),
+            patch.object(self.buffer, '_ensure_flusher'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_for_user_does_not_write(self):
+        with self.assertNumQueries(0):
+            token = RefreshToken.for_user(self.user)
+        self.assertFalse(OutstandingToken.objects.exists())
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.buffer.flush(), 1)
+        outstanding_token = OutstandingToken.objects.get()
+        self.assertEqual(outstanding_token.jti, token['jti'])
+        self.assertEqual(outstanding_token.user, self.user)
+
+    def test_afor_user_does_not_write(self):
+        async_to_sync(RefreshToken.afor_user)(self.user)
+        self.assertFalse(OutstandingToken.objects.exists())
+        self.assertEqual(self.buffer.flush(), 1)
+
+    def test_full_buffer_wakes_flusher(self):
+        RefreshToken.for_user(self.user)
+        RefreshToken.for_user(self.user)
+        self.assertFalse(self.buffer._wakeup.is_set())
+        RefreshToken.for_user(self.user)
+        self.assertTrue(self.buffer._wakeup.is_set())
+
+    def test_unflushed_token_can_be_blacklisted(self):
+        token = RefreshToken.for_user(self.user)
+        blacklist = DatabaseTokenBlacklist()
+        self.assertFalse(blacklist.is_blacklisted(token))
+
+        blacklist.blacklist(token)
+        self.buffer.flush()
+
+        self.assertTrue(blacklist.is_blacklisted(token))
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+        self.assertTrue(BlacklistedToken.objects.filter(token__jti=token['jti']).exists())
+
+    def test_flush_failure_drops_batch(self):
+        RefreshToken.for_user(self.user)
+        with patch.object(OutstandingToken.objects, 'bulk_create', side_effect=DatabaseError):
+            self.assertEqual(self.buffer.flush(), 0)
+        self.assertEqual(self.buffer.flush(), 0)
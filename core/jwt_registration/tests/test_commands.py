@@ -0,0 +1,75 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.hashers import get_hasher
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, override_settings
+
+from jwt_registration.hashers import CalibratedPBKDF2PasswordHasher
+
+
+class CalibratePasswordHashersCommandTestCase(SimpleTestCase):
+
+    def call(self, *args):
+        stdout = StringIO()
+        call_command(
+            'calibrate_password_hashers', '--samples=1', '--pbkdf2-iterations', '1000', '2000',
+            '--min-pbkdf2-iterations=1000', '--scrypt-work-factors', '1024', *args,
+            stdout=stdout, stderr=StringIO()
+        )
+        return stdout.getvalue()
+
+    def test_reports_benchmarks_and_recommendation(self):
+        output = self.call('--target-ms=10000')
+        self.assertIn('iterations=1000', output)
+        self.assertIn('work_factor=1024', output)
+        self.assertIn('Recommended parameters', output)
+
+    def test_writes_profile(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'password_hashers.json')
+            self.call('--target-ms=10000', '--algorithm=pbkdf2_sha256', f'--output={path}')
+            with open(path) as file:
+                profile = json.load(file)
+
+        self.assertEqual(profile['hashers'][0], 'jwt_registration.hashers.CalibratedPBKDF2PasswordHasher')
+        self.assertNotIn('django.contrib.auth.hashers.PBKDF2PasswordHasher', profile['hashers'])
+        self.assertEqual(profile['params']['pbkdf2_sha256'], {'iterations': 2000})
+
+
+class CalibratedHasherTestCase(SimpleTestCase):
+
+    @override_settings(
+        PASSWORD_HASHERS=['jwt_registration.hashers.CalibratedPBKDF2PasswordHasher'],
+        PASSWORD_HASHERS_PROFILE={'params': {'pbkdf2_sha256': {'iterations': 1234}}},
+    )
+    def test_profile_params_are_applied(self):
+        hasher = get_hasher('default')
+        self.assertIsInstance(hasher, CalibratedPBKDF2PasswordHasher)
+        self.assertEqual(hasher.iterations, 1234)
+        self.assertTrue(hasher.encode('password', hasher.salt()).startswith('pbkdf2_sha256$1234$'))
+
+
+class BenchTokenSigningCommandTestCase(SimpleTestCase):
+
+    def test_reports_every_algorithm(self):
+        stdout = StringIO()
+        call_command('bench_token_signing', '--iterations=2', '--algorithms', 'HS256', 'EdDSA', stdout=stdout)
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual([line.split()[0] for line in lines], ['algorithm', 'HS256', 'EdDSA'])
+
+
+class BenchTokenValidateCommandTestCase(SimpleTestCase):
+
+    def test_single_iteration(self):
+        stdout = StringIO()
+        call_command('bench_token_validate', '--iterations=1', stdout=stdout)
+        self.assertEqual([line.split()[0] for line in stdout.getvalue().splitlines()],
+                         ['TokenVerifyView', 'fast-validate', 'speedup'])
+
+    def test_rejects_no_iterations(self):
+        with self.assertRaises(CommandError):
+            call_command('bench_token_validate', '--iterations=0', stdout=StringIO())
@@ -0,0 +1,78 @@
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth.hashers import check_password
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.exeptions import PasswordHashingUnavailable
+from jwt_registration.hashing import PasswordHashingPool, authenticate_user, hash_password
+from user_profile.models import User
+
+
+class PasswordHashingPoolTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.pool = PasswordHashingPool(max_workers=1, max_queue=1, timeout=1)
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+
+    def test_run_returns_result(self):
+        self.assertEqual(self.pool.run('hash', lambda value: value * 2, 21), 42)
+
+    def test_saturated_pool_rejects_quickly(self):
+        for _ in range(2):
+            threading.Thread(target=self.pool.run, args=('hash', self.release.wait), daemon=True).start()
+        self._wait_for_slots(0)
+        with self.assertRaises(PasswordHashingUnavailable):
+            self.pool.run('hash', lambda: None)
+
+    def test_slow_job_times_out(self):
+        self.pool.timeout = 0.05
+        with self.assertRaises(PasswordHashingUnavailable):
+            self.pool.run('verify', self.release.wait)
+
+    def test_slots_are_released(self):
+        for _ in range(5):
+            self.pool.run('hash', lambda: None)
+        self._wait_for_slots(2)
+
+    def _wait_for_slots(self, value):
+        for _ in range(100):
+            if self.pool._slots._value == value:
+                return
+            threading.Event().wait(0.01)
+        self.fail(f'pool slots did not reach {value}')
+
+
+class PasswordHashingTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='test@example.com', password='testpassword', first_name='first', last_name='last')
+
+    def test_hash_password(self):
+        self.assertTrue(check_password('secret_123', hash_password('secret_123')))
+
+    def test_authenticate_user(self):
+        self.assertEqual(authenticate_user('test@example.com', 'testpassword'), self.user)
+        self.assertIsNone(authenticate_user('test@example.com', 'wrong'))
+        self.assertIsNone(authenticate_user('missing@example.com', 'testpassword'))
+
+    def test_inactive_user_is_not_authenticated(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(authenticate_user('test@example.com', 'testpassword'))
+
+
+class SaturatedHashingPoolViewsTestCase(APITestCase):
+
+    @patch('jwt_registration.hashing.PasswordHashingPool.run', side_effect=PasswordHashingUnavailable)
+    def test_login_returns_503(self, mock_run):
+        User.objects.create_user(email='test@example.com', password='testpassword', first_name='f', last_name='l')
+        response = self.client.post(reverse('login'), {'email': 'test@example.com', 'password': 'testpassword'})
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
@@ -0,0 +1,100 @@
+import smtplib
+import threading
+from unittest.mock import patch, MagicMock
+
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core.redis_client import get_redis_client, make_redis_key
+from jwt_registration.mailing import (
+    PooledEmailSender, REJECTED, SENT, FAILED, enqueue_email, get_email_dispatch_executor, send_queued_emails,
+)
+from jwt_registration.tasks import queue_verification_email
+
+
+class PooledEmailSenderTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.sender = PooledEmailSender(reconnect_attempts=1)
+        self.sender.connection = MagicMock()
+        self.message = mail.EmailMessage('subject', 'body', 'from@example.com', ['to@example.com'])
+
+    def test_connection_is_reused(self):
+        for _ in range(3):
+            self.assertEqual(self.sender.send(self.message), SENT)
+        self.assertEqual(self.sender.connection.send_messages.call_count, 3)
+        self.sender.connection.close.assert_not_called()
+
+    def test_reconnects_after_failure(self):
+        self.sender.connection.send_messages.side_effect = [smtplib.SMTPServerDisconnected, 1]
+        self.assertEqual(self.sender.send(self.message), SENT)
+        self.sender.connection.close.assert_called_once()
+        self.assertEqual(self.sender.connection.open.call_count, 2)
+
+    def test_gives_up_after_reconnect_attempts(self):
+        self.sender.connection.open.side_effect = OSError
+        self.assertEqual(self.sender.send(self.message), FAILED)
+        self.assertEqual(self.sender.connection.open.call_count, 2)
+
+    def test_refused_recipient_is_not_retried(self):
+        self.sender.connection.send_messages.side_effect = smtplib.SMTPRecipientsRefused({'to@example.com': ()})
+        self.assertEqual(self.sender.send(self.message), REJECTED)
+        self.sender.connection.send_messages.assert_called_once()
+
+
+class SendQueuedEmailsTestCase(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.queue_key = make_redis_key(settings.EMAIL_QUEUE_CACHE_KEY)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_drains_queue_in_batches(self):
+        for i in range(5):
+            enqueue_email('Verify your email!', f'message {i}', f'user{i}@example.com')
+
+        with patch('jwt_registration.mailing.EMAIL_BATCH_SECONDS') as mock_batch_seconds:
+            self.assertEqual(send_queued_emails(batch_size=2), 5)
+
+        self.assertEqual(mock_batch_seconds.observe.call_count, 3)
+        self.assertEqual([message.to for message in mail.outbox], [[f'user{i}@example.com'] for i in range(5)])
+        self.assertEqual(mail.outbox[0].from_email, settings.DEFAULT_FROM_EMAIL)
+        self.assertEqual(get_redis_client().llen(self.queue_key), 0)
+
+    @patch('jwt_registration.mailing.PooledEmailSender.send', return_value=FAILED)
+    def test_failed_emails_stay_queued(self, mock_send):
+        for i in range(3):
+            enqueue_email('Verify your email!', 'message', f'user{i}@example.com')
+
+        self.assertEqual(send_queued_emails(batch_size=2), 0)
+
+        self.assertEqual(mock_send.call_count, 2)
+        self.assertEqual(get_redis_client().llen(self.queue_key), 3)
+
+    @patch('jwt_registration.tasks.time.sleep')
+    @patch('jwt_registration.tasks.dispatch_verification_emails.delay')
+    def test_queue_verification_email_schedules_one_dispatch(self, mock_delay, mock_sleep):
+        for i in range(3):
+            queue_verification_email('Verify your email!', 'message', f'user{i}@example.com')
+        get_email_dispatch_executor().submit(lambda: None).result(timeout=5)
+
+        mock_sleep.assert_called_once_with(settings.EMAIL_BATCH_DELAY)
+        mock_delay.assert_called_once_with()
+        self.assertEqual(get_redis_client().llen(self.queue_key), 3)
+
+    @patch('jwt_registration.tasks.time.sleep')
+    @patch('jwt_registration.tasks.dispatch_verification_emails.delay')
+    def test_queue_verification_email_returns_before_dispatch(self, mock_delay, mock_sleep):
+        released = threading.Event()
+        mock_sleep.side_effect = lambda delay: released.wait(timeout=5)
+
+        queue_verification_email('Verify your email!', 'message', 'user@example.com')
+
+        mock_delay.assert_not_called()
+        released.set()
+        get_email_dispatch_executor().submit(lambda: None).result(timeout=5)
+        mock_delay.assert_called_once_with()
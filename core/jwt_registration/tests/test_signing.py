@@ -0,0 +1,82 @@
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework_simplejwt.exceptions import TokenBackendError
+
+from jwt_registration.signing import KeyedTokenBackend, SigningKeySet, get_signing_keyset
+
+
+def private_key_pem(algorithm):
+    if algorithm == 'RS256':
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    else:
+        key = ed25519.Ed25519PrivateKey.generate()
+    return key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+
+
+def public_key_pem(private_pem):
+    return serialization.load_pem_private_key(private_pem, password=None).public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+
+
+class SigningKeySetTestCase(SimpleTestCase):
+    payload = {'token_type': 'access', 'user_id': 1, 'exp': 4102444800, 'jti': 'jti'}
+
+    def test_asymmetric_tokens_carry_key_id_and_verify_with_jwks(self):
+        for algorithm in ('RS256', 'EdDSA'):
+            with self.subTest(algorithm=algorithm):
+                backend = KeyedTokenBackend(SigningKeySet(algorithm, private_key_pem(algorithm)))
+                token = backend.encode(self.payload)
+
+                header = jwt.get_unverified_header(token)
+                self.assertEqual(header['alg'], algorithm)
+                self.assertEqual(header['kid'], backend.keyset.key_id)
+                self.assertEqual(backend.decode(token)['user_id'], 1)
+
+                [jwk] = backend.keyset.jwks()['keys']
+                self.assertEqual(jwk['kid'], header['kid'])
+                self.assertNotIn('d', jwk)
+                public_key = jwt.PyJWK(jwk).key
+                self.assertEqual(jwt.decode(token, public_key, algorithms=[algorithm])['user_id'], 1)
+
+    def test_retired_keys_still_verify(self):
+        old_private = private_key_pem('EdDSA')
+        old_token = KeyedTokenBackend(SigningKeySet('EdDSA', old_private)).encode(self.payload)
+        backend = KeyedTokenBackend(SigningKeySet('EdDSA', private_key_pem('EdDSA'), [public_key_pem(old_private)]))
+
+        self.assertEqual(backend.decode(old_token)['jti'], 'jti')
+        self.assertEqual(len(backend.keyset.jwks()['keys']), 2)
+        self.assertEqual(backend.keyset.jwks()['keys'][0]['kid'], backend.keyset.key_id)
+
+    def test_unknown_key_id_is_rejected(self):
+        token = KeyedTokenBackend(SigningKeySet('EdDSA', private_key_pem('EdDSA'))).encode(self.payload)
+        backend = KeyedTokenBackend(SigningKeySet('EdDSA', private_key_pem('EdDSA')))
+        with self.assertRaises(TokenBackendError):
+            backend.decode(token)
+
+    def test_symmetric_keys_are_not_published(self):
+        keyset = SigningKeySet('HS256', 'secret')
+        token = KeyedTokenBackend(keyset).encode(self.payload)
+        self.assertNotIn('kid', jwt.get_unverified_header(token))
+        self.assertEqual(keyset.jwks(), {'keys': []})
+
+    def test_unsupported_algorithm(self):
+        with self.assertRaises(TokenBackendError):
+            SigningKeySet('none', 'secret')
+
+
+class JwksViewTestCase(SimpleTestCase):
+
+    def test_jwks(self):
+        response = self.client.get(reverse('jwks'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=3600', response['Cache-Control'])
+        self.assertEqual(response.json(), get_signing_keyset().jwks())
+
+    def test_jwks_only_allows_get(self):
+        self.assertEqual(self.client.post(reverse('jwks')).status_code, 405)
@@ -0,0 +1,123 @@
+import threading
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.conf import settings
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from core.exeptions import TwoCommitsError
+from jwt_registration.models import OutboxMessage
+from jwt_registration.tasks import (
+    dispatch_outbox_message, dispatch_pending_outbox_messages, prune_expired_tokens, schedule_outbox_dispatch,
+)
+from jwt_registration.utils import REGISTRATION_SELF_PACKAGE
+
+
+class PruneExpiredTokensTaskTestCase(TestCase):
+
+    def setUp(self):
+        now = aware_utcnow()
+        self.expired = [
+            OutstandingToken.objects.create(jti=f'expired-{i}', token='token', expires_at=now - timedelta(days=1))
+            for i in range(5)
+        ]
+        self.active = OutstandingToken.objects.create(jti='active', token='token', expires_at=now + timedelta(days=1))
+        BlacklistedToken.objects.create(token=self.expired[0])
+        BlacklistedToken.objects.create(token=self.active)
+
+    @patch('jwt_registration.tasks.time.sleep')
+    def test_prune_expired_tokens(self, mock_sleep):
+        removed = prune_expired_tokens(batch_size=2, pause=0.1)
+
+        self.assertEqual(removed, {'outstanding': 5, 'blacklisted': 1})
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), ['active'])
+        self.assertTrue(BlacklistedToken.objects.filter(token=self.active).exists())
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    def test_prune_without_expired_tokens(self):
+        OutstandingToken.objects.filter(expires_at__lte=aware_utcnow()).delete()
+        self.assertEqual(prune_expired_tokens(), {'outstanding': 0, 'blacklisted': 0})
+
+
+class DispatchOutboxMessageTaskTestCase(TestCase):
+
+    def setUp(self):
+        self.message = OutboxMessage.objects.create(
+            payload={'email': 'test_user@example.com'},
+            self_package=REGISTRATION_SELF_PACKAGE,
+        )
+
+    @patch('jwt_registration.tasks.HeadTwoCommitsPattern')
+    def test_dispatch_success_removes_message(self, mock_head):
+        dispatch_outbox_message(self.message.id)
+
+        mock_head.assert_called_once_with(data={'email': 'test_user@example.com'},
+                                          self_package=REGISTRATION_SELF_PACKAGE)
+        mock_head.return_value.two_commits_operation.assert_called_once()
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    @patch('jwt_registration.tasks.dispatch_outbox_message.apply_async')
+    @patch('jwt_registration.tasks.HeadTwoCommitsPattern.two_commits_operation', side_effect=TwoCommitsError)
+    def test_dispatch_failure_schedules_retry(self, mock_operation, mock_apply_async):
+        dispatch_outbox_message(self.message.id)
+        dispatch_outbox_message(self.message.id)
+
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.status, OutboxMessage.StatusChoices.PENDING)
+        self.assertEqual(self.message.attempts, 1)
+        self.assertGreater(self.message.available_at, timezone.now())
+        self.assertIn('TwoCommitsError', self.message.last_error)
+        mock_operation.assert_called_once()
+        mock_apply_async.assert_called_once_with((self.message.id,), countdown=settings.OUTBOX_RETRY_BASE)
+
+    @patch('jwt_registration.tasks.dispatch_outbox_message.apply_async')
+    @patch('jwt_registration.tasks.HeadTwoCommitsPattern.two_commits_operation', side_effect=TwoCommitsError)
+    def test_dispatch_marks_failed_after_max_attempts(self, mock_operation, mock_apply_async):
+        OutboxMessage.objects.filter(id=self.message.id).update(attempts=settings.OUTBOX_MAX_ATTEMPTS - 1)
+
+        dispatch_outbox_message(self.message.id)
+
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.status, OutboxMessage.StatusChoices.FAILED)
+        mock_apply_async.assert_not_called()
+
+    @patch('jwt_registration.tasks.HeadTwoCommitsPattern.two_commits_operation')
+    def test_dispatch_skips_leased_message(self, mock_operation):
+        OutboxMessage.objects.filter(id=self.message.id).update(
+            status=OutboxMessage.StatusChoices.PROCESSING, available_at=timezone.now() + timedelta(minutes=1))
+
+        dispatch_outbox_message(self.message.id)
+
+        mock_operation.assert_not_called()
+        self.assertTrue(OutboxMessage.objects.exists())
+
+    @patch('jwt_registration.tasks.dispatch_outbox_message.delay')
+    def test_dispatch_pending_outbox_messages(self, mock_delay):
+        stale = OutboxMessage.objects.create(
+            payload={}, self_package={}, status=OutboxMessage.StatusChoices.PROCESSING,
+            available_at=timezone.now() - timedelta(minutes=1))
+        OutboxMessage.objects.create(payload={}, self_package={}, status=OutboxMessage.StatusChoices.FAILED)
+        OutboxMessage.objects.create(payload={}, self_package={}, available_at=timezone.now() + timedelta(minutes=1))
+
+        self.assertEqual(dispatch_pending_outbox_messages(), 2)
+        self.assertEqual(sorted(call.args[0] for call in mock_delay.call_args_list),
+                         sorted([self.message.id, stale.id]))
+
+    @patch('jwt_registration.tasks.dispatch_outbox_message.delay')
+    def test_schedule_outbox_dispatch_runs_off_the_calling_thread(self, mock_delay):
+        threads = []
+        mock_delay.side_effect = lambda message_id: threads.append(threading.get_ident())
+
+        schedule_outbox_dispatch(self.message.id).result(timeout=5)
+
+        mock_delay.assert_called_once_with(self.message.id)
+        self.assertNotIn(threading.get_ident(), threads)
+
+    @patch('jwt_registration.tasks.dispatch_outbox_message.delay', side_effect=ConnectionError)
+    def test_schedule_outbox_dispatch_leaves_failures_to_the_sweep(self, mock_delay):
+        schedule_outbox_dispatch(self.message.id).result(timeout=5)
+
+        self.assertTrue(OutboxMessage.objects.filter(id=self.message.id).exists())
@@ -0,0 +1,77 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from redis import RedisError
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from jwt_registration.throttling import SlidingWindowLimiter
+from user_profile.models import User
+
+
+class SlidingWindowLimiterTestCase(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.limiter = SlidingWindowLimiter(window=60, backoff_base=30, backoff_max=100, strikes_ttl=600)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_allows_up_to_limit(self):
+        for _ in range(3):
+            self.assertEqual(self.limiter.hit({'email:a': 3}), 0)
+        self.assertEqual(self.limiter.hit({'email:a': 3}), 30)
+
+    def test_backoff_grows_with_strikes(self):
+        self.assertEqual(self.limiter.hit({'email:a': 0}), 30)
+        cache.delete('login_attempts_block_email:a')
+        self.assertEqual(self.limiter.hit({'email:a': 0}), 60)
+        cache.delete('login_attempts_block_email:a')
+        self.assertEqual(self.limiter.hit({'email:a': 0}), 100)
+
+    def test_rejected_attempt_is_not_counted_in_other_scopes(self):
+        self.limiter.hit({'email:a': 1})
+        self.assertGreater(self.limiter.hit({'email:a': 1, 'ip:1': 1}), 0)
+        self.assertEqual(self.limiter.hit({'ip:1': 1}), 0)
+
+    def test_reset(self):
+        self.limiter.hit({'email:a': 1})
+        self.limiter.reset('email:a')
+        self.assertEqual(self.limiter.hit({'email:a': 1}), 0)
+
+
+@override_settings(LOGIN_ATTEMPTS_PER_EMAIL=2)
+class LoginAttemptThrottleTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('login')
+        User.objects.create_user(email='test@example.com', password='testpassword', first_name='f', last_name='l')
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_rejects_before_authentication(self):
+        for _ in range(2):
+            response = self.client.post(self.url, {'email': 'test@example.com', 'password': 'wrong'})
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        with patch('jwt_registration.views.authenticate_user') as mock_authenticate:
+            response = self.client.post(self.url, {'email': 'Test@Example.com', 'password': 'testpassword'})
+        mock_authenticate.assert_not_called()
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+
+    def test_successful_login_resets_email_window(self):
+        self.client.post(self.url, {'email': 'test@example.com', 'password': 'wrong'})
+        self.client.post(self.url, {'email': 'test@example.com', 'password': 'testpassword'})
+        response = self.client.post(self.url, {'email': 'test@example.com', 'password': 'wrong'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @patch('jwt_registration.throttling.SlidingWindowLimiter.hit', side_effect=RedisError)
+    def test_redis_failure_does_not_block_login(self, mock_hit):
+        response = self.client.post(self.url, {'email': 'test@example.com', 'password': 'testpassword'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,129 @@
+from datetime import timedelta
+from unittest.mock import MagicMock
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.test import SimpleTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from jwt_registration.token_validation import (
+    AccessTokenValidator, FastTokenValidateApplication, FastTokenValidateASGIApplication
+)
+
+
+class AccessTokenValidatorTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.validator = AccessTokenValidator()
+        self.token = AccessToken()
+        self.token['user_id'] = 1
+
+    def test_valid_token(self):
+        payload = self.validator.validate(str(self.token))
+        self.assertEqual(payload['user_id'], 1)
+
+    def test_expired_token(self):
+        self.token.set_exp(lifetime=-timedelta(seconds=1))
+        self.assertIsNone(self.validator.validate(str(self.token)))
+
+    def test_bad_signature(self):
+        header, payload, signature = str(self.token).split('.')
+        self.assertIsNone(self.validator.validate(f'{header}.{payload}.{signature[::-1]}'))
+
+    def test_token_without_user_id(self):
+        self.assertIsNone(self.validator.validate(str(AccessToken())))
+
+    def test_validate_header(self):
+        self.assertIsNotNone(self.validator.validate_header(f'Bearer {self.token}'))
+        self.assertIsNone(self.validator.validate_header(f'Token {self.token}'))
+        self.assertIsNone(self.validator.validate_header(str(self.token)))
+        self.assertIsNone(self.validator.validate_header(None))
+
+    def test_validate_header_with_non_ascii_token(self):
+        self.assertIsNone(self.validator.validate_header('Bearer \xff\xfe'))
+        self.assertIsNone(self.validator.validate_header('Bearer \u0100'))
+        self.assertIsNone(self.validator.validate_header(b'Bearer \xff\xfe'))
+
+
+class FastTokenValidateApplicationTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.inner_application = MagicMock(return_value=[b'inner'])
+        self.application = FastTokenValidateApplication(self.inner_application)
+        self.start_response = MagicMock()
+        self.token = AccessToken()
+        self.token['user_id'] = 1
+
+    def environ(self, path, authorization=None):
+        environ = {'PATH_INFO': path}
+        if authorization:
+            environ['HTTP_AUTHORIZATION'] = authorization
+        setup_testing_defaults(environ)
+        return environ
+
+    def test_valid_token_short_circuits(self):
+        environ = self.environ(settings.FAST_TOKEN_VALIDATE_PATH, f'Bearer {self.token}')
+        body = self.application(environ, self.start_response)
+        self.assertEqual(body, [b'{"detail": "Token is valid"}'])
+        self.assertEqual(self.start_response.call_args.args[0], '200 OK')
+        self.inner_application.assert_not_called()
+
+    def test_invalid_token_short_circuits(self):
+        environ = self.environ(settings.FAST_TOKEN_VALIDATE_PATH, 'Bearer invalid')
+        body = self.application(environ, self.start_response)
+        self.assertEqual(body, [b'{"error": "Invalid token"}'])
+        self.assertEqual(self.start_response.call_args.args[0], '401 Unauthorized')
+        self.inner_application.assert_not_called()
+
+    def test_non_ascii_token_is_unauthorized(self):
+        environ = self.environ(settings.FAST_TOKEN_VALIDATE_PATH, 'Bearer \xff\xfe')
+        body = self.application(environ, self.start_response)
+        self.assertEqual(body, [b'{"error": "Invalid token"}'])
+        self.assertEqual(self.start_response.call_args.args[0], '401 Unauthorized')
+
+    def test_other_paths_are_passed_through(self):
+        environ = self.environ('/account/api/v1/login/')
+        body = self.application(environ, self.start_response)
+        self.assertEqual(body, [b'inner'])
+        self.inner_application.assert_called_once_with(environ, self.start_response)
+
+
+class FastTokenValidateASGIApplicationTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.token = AccessToken()
+        self.token['user_id'] = 1
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    async def inner_application(self, scope, receive, send):
+        self.sent.append('inner')
+
+    async def test_valid_token_short_circuits(self):
+        application = FastTokenValidateASGIApplication(self.inner_application)
+        scope = {
+            'type': 'http',
+            'path': settings.FAST_TOKEN_VALIDATE_PATH,
+            'headers': [(b'authorization', f'Bearer {self.token}'.encode())],
+        }
+        await application(scope, None, self.send)
+        self.assertEqual(self.sent[0]['status'], 200)
+        self.assertEqual(self.sent[1]['body'], b'{"detail": "Token is valid"}')
+
+    async def test_non_utf8_token_is_unauthorized(self):
+        application = FastTokenValidateASGIApplication(self.inner_application)
+        scope = {
+            'type': 'http',
+            'path': settings.FAST_TOKEN_VALIDATE_PATH,
+            'headers': [(b'authorization', b'Bearer \xff\xfe')],
+        }
+        await application(scope, None, self.send)
+        self.assertEqual(self.sent[0]['status'], 401)
+        self.assertEqual(self.sent[1]['body'], b'{"error": "Invalid token"}')
+
+    async def test_other_paths_are_passed_through(self):
+        application = FastTokenValidateASGIApplication(self.inner_application)
+        await application({'type': 'http', 'path': '/account/api/v1/login/', 'headers': []}, None, self.send)
+        self.assertEqual(self.sent, ['inner'])
@@ -30,3 +30,12 @@ class TestUrls(SimpleTestCase):
     def test_update_important_data_url_is_resolve(self):
         url = reverse('update_important_data')
         self.assertEqual(resolve(url).func.view_class, views.UpdateImportantDataAPIView)
+
+    def test_token_fast_validate_is_resolve(self):
+        url = reverse('token_fast_validate')
+        self.assertEqual(resolve(url).func, views.fast_validate_token)
+
+    def test_jwks_is_resolve(self):
+        url = reverse('jwks')
+        self.assertEqual(url, '/.well-known/jwks.json')
+        self.assertEqual(resolve(url).func, views.jwks)
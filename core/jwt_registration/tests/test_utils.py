@@ -1,3 +1,4 @@
+import time
 from unittest.mock import patch, MagicMock
 
 from django.test import TestCase
@@ -5,6 +6,7 @@ from rest_framework.exceptions import ValidationError
 from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from core.exeptions import TwoCommitsError
 from jwt_registration.utils import HeadTwoCommitsPattern
 from jwt_registration.utils import put_token_on_blacklist
 from user_profile.models import User
@@ -95,3 +97,54 @@ class HeadTwoCommitsPatternTestCase(TestCase):
             self.head.two_commits_operation()
         except Exception as e:
             self.fail(f"two_commits_operation вызвал исключение: {e}")
+
+
+class HeadTwoCommitsPatternFanOutTestCase(TestCase):
+
+    def setUp(self):
+        self.self_package = {
+            service: {'create': f'{service}_create', 'confirm': f'{service}_confirm', 'rollback': f'{service}_rollback'}
+            for service in ('company', 'calendar', 'chat')
+        }
+        self.head = HeadTwoCommitsPattern(
+            data={'email': 'test_email@gmail.com'},
+            self_package=self.self_package,
+            deadline=0.5,
+        )
+
+    def test_services_are_called_concurrently(self):
+        def send(service, path):
+            time.sleep(0.2)
+            return 200
+
+        with patch.object(self.head, '_send', side_effect=send) as mock_send:
+            start = time.monotonic()
+            self.head.two_commits_operation()
+            elapsed = time.monotonic() - start
+
+        self.assertEqual(mock_send.call_count, 6)
+        self.assertLess(elapsed, 0.6)
+
+    def test_statuses_are_aggregated_per_service(self):
+        def send(service, path):
+            if service == 'chat':
+                raise ConnectionError
+            return 404 if service == 'calendar' else 200
+
+        with patch.object(self.head, '_send', side_effect=send):
+            self.assertEqual(self.head._create_object(), {'company': 200, 'calendar': 404, 'chat': None})
+
+    def test_slow_service_misses_the_deadline(self):
+        def send(service, path):
+            if path == 'calendar_create':
+                time.sleep(1)
+            return 200
+
+        with patch.object(self.head, '_send', side_effect=send) as mock_send:
+            with self.assertRaises(TwoCommitsError) as e:
+                self.head.two_commits_operation()
+
+        self.assertEqual(e.exception.detail['statuses'], {'company': '200', 'calendar': 'None', 'chat': '200'})
+        self.assertIn('calendar', e.exception.detail['error'])
+        rollbacks = {call.args[1] for call in mock_send.call_args_list if call.args[1].endswith('rollback')}
+        self.assertEqual(rollbacks, {'company_rollback', 'calendar_rollback', 'chat_rollback'})
@@ -1,3 +1,6 @@
+import hashlib
+import json
+
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
@@ -9,6 +12,14 @@ from itsdangerous import BadSignature, SignatureExpired
 from freezegun import freeze_time
 from django.utils import timezone
 from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
+from django.db import DatabaseError
+from core.metrics import EMAIL_VERIFY_SUPPRESSED
+from core.redis_client import get_redis_client, make_redis_key
+from jwt_registration.idempotency import email_lock, request_fingerprint
+from jwt_registration.models import OutboxMessage
+from jwt_registration.utils import REGISTRATION_SELF_PACKAGE, get_email_verify_signer
 
 
 class RegistrationAPITestCase(APITestCase):
@@ -31,12 +42,86 @@ class RegistrationAPITestCase(APITestCase):
             'password2': 'wrong_test_pass123',
         }
 
-    @patch("jwt_registration.views.HeadTwoCommitsPattern.two_commits_operation")
-    def test_registration(self, test):
-        response = self.client.post(self.registration_url, self.user_data)
+    @patch("jwt_registration.views.schedule_outbox_dispatch")
+    def test_registration(self, mock_dispatch):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.registration_url, self.user_data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertTrue(User.objects.filter(
             email=self.user_data['email']).exists())
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.payload, {'email': self.user_data['email']})
+        self.assertEqual(message.self_package, REGISTRATION_SELF_PACKAGE)
+        mock_dispatch.assert_called_once_with(message.id)
+
+    @patch("jwt_registration.views.schedule_outbox_dispatch")
+    def test_registration_rolls_back_without_outbox_message(self, mock_dispatch):
+        with patch("jwt_registration.views.OutboxMessage.objects.create", side_effect=DatabaseError), \
+                self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(DatabaseError):
+                self.client.post(self.registration_url, self.user_data)
+        self.assertFalse(User.objects.filter(email=self.user_data['email']).exists())
+        mock_dispatch.assert_not_called()
+
+    @patch("jwt_registration.views.schedule_outbox_dispatch")
+    def test_registration_replay_with_idempotency_key(self, mock_dispatch):
+        cache.clear()
+        first = self.client.post(self.registration_url, self.user_data, HTTP_IDEMPOTENCY_KEY='key-1')
+        with patch("jwt_registration.views.UserImportantSerializer") as mock_serializer:
+            replay = self.client.post(self.registration_url, self.user_data, HTTP_IDEMPOTENCY_KEY='key-1')
+
+        self.assertEqual(replay.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replay.data, first.data)
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        mock_serializer.assert_not_called()
+        self.assertEqual(User.objects.filter(email=self.user_data['email']).count(), 1)
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+    @patch("jwt_registration.views.schedule_outbox_dispatch")
+    def test_registration_idempotency_key_reused_with_other_body(self, mock_dispatch):
+        cache.clear()
+        self.client.post(self.registration_url, self.user_data, HTTP_IDEMPOTENCY_KEY='key-2')
+        response = self.client.post(self.registration_url, {**self.user_data, 'first_name': 'other'},
+                                    HTTP_IDEMPOTENCY_KEY='key-2')
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_request_fingerprint_is_keyed_with_secret_key(self):
+        fingerprint = request_fingerprint(self.user_data)
+        body = json.dumps(self.user_data, sort_keys=True, default=str).encode()
+        self.assertEqual(request_fingerprint(dict(self.user_data)), fingerprint)
+        self.assertNotEqual(fingerprint, hashlib.sha256(body).hexdigest())
+        with override_settings(SECRET_KEY='another-secret-key'):
+            self.assertNotEqual(request_fingerprint(self.user_data), fingerprint)
+
+    @override_settings(REGISTRATION_LOCK_WAIT=0)
+    def test_registration_waits_behind_email_lock(self):
+        cache.clear()
+        cache.add(settings.REGISTRATION_LOCK_CACHE_KEY.format(email=self.user_data['email']), 'other')
+        with patch("jwt_registration.views.UserImportantSerializer") as mock_serializer:
+            response = self.client.post(self.registration_url, self.user_data)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        mock_serializer.assert_not_called()
+        cache.clear()
+
+    def test_email_lock_keeps_a_lock_taken_over_by_another_request(self):
+        cache.clear()
+        key = make_redis_key(settings.REGISTRATION_LOCK_CACHE_KEY.format(email=self.user_data['email']))
+        with email_lock(self.user_data['email']):
+            # The lock expired mid-request and another registration picked it up.
+            get_redis_client().set(key, 'other')
+        self.assertEqual(get_redis_client().get(key), b'other')
+        cache.clear()
+
+    def test_email_lock_released_on_exit(self):
+        cache.clear()
+        with email_lock(self.user_data['email']):
+            pass
+        key = make_redis_key(settings.REGISTRATION_LOCK_CACHE_KEY.format(email=self.user_data['email']))
+        self.assertIsNone(get_redis_client().get(key))
+
+    def test_registration_idempotency_key_too_long(self):
+        response = self.client.post(self.registration_url, self.user_data, HTTP_IDEMPOTENCY_KEY='k' * 256)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
     def test_registration_invalid_data(self):
         response = self.client.post(
@@ -89,6 +174,18 @@ class RegistrationAPITestCase(APITestCase):
         self.assertEqual(response.data.get('detail'),
                          'Successfully logged out')
 
+    def test_refresh_after_logout(self):
+        user = User.objects.create_user(
+            email=self.user_data['email'],
+            first_name=self.user_data['first_name'],
+            last_name=self.user_data['last_name'],
+        )
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.client.post(self.logout_url, {'refresh_token': str(refresh)})
+        response = self.client.post(reverse('token_refresh'), {'refresh': str(refresh)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
     def test_logout_without_refresh_token(self):
         user = User.objects.create_user(
             email=self.user_data['email'],
@@ -181,8 +278,11 @@ class UpdateImportantDataAPIViewTestCase(APITestCase):
         client.force_login(user=self.user)
         client.credentials(HTTP_AUTHORIZATION=f'Bearer {
                            self.refresh.access_token}')
+        version_key = settings.USER_PROFILE_VERSION_CACHE_KEY.format(user=self.user.id)
+        cache.set(version_key, 5)
         response = client.patch(self.url, self.data, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(cache.get(version_key), 6)
         self.user.refresh_from_db()
         self.assertEqual(self.user.email, self.data['data_to_update']['email'])
         self.assertIn('refresh_token', response.data)
@@ -238,6 +338,7 @@ class UpdateImportantDataAPIViewTestCase(APITestCase):
 
 class EmailVerifyTestCase(APITestCase):
     def setUp(self):
+        cache.clear()
         self.user = User.objects.create(email='test@gmail.com')
         self.data_to_post = {
             'email': 'test@gmail.com'
@@ -246,7 +347,7 @@ class EmailVerifyTestCase(APITestCase):
         self.url = settings.REGISTRATION_SERVICE_URL + \
             reverse('to_email_verify')
 
-    @patch('jwt_registration.tasks.send_verification_email.delay')
+    @patch('jwt_registration.views.queue_verification_email')
     def test_email_verify_successful(self, mock_send_mail):
         response = self.client.post(self.url, self.data_to_post)
 
@@ -277,7 +378,7 @@ class EmailVerifyTestCase(APITestCase):
         self.assertEqual(
             response.data, {'detail': 'Email is already verified.'})
 
-    @patch('jwt_registration.tasks.send_verification_email.delay')
+    @patch('jwt_registration.views.queue_verification_email')
     def test_invalid_token(self, mock_send_mail):
         response = self.client.post(self.url, self.data_to_post)
 
@@ -292,7 +393,7 @@ class EmailVerifyTestCase(APITestCase):
         self.assertEqual(response.status_code, 406)
         self.assertEqual(response.data, {'error': 'Invalid token'})
 
-    @patch('jwt_registration.tasks.send_verification_email.delay')
+    @patch('jwt_registration.views.queue_verification_email')
     def test_token_expired(self, mock_send_mail):
         response = self.client.post(self.url, self.data_to_post)
 
@@ -306,7 +407,75 @@ class EmailVerifyTestCase(APITestCase):
             self.assertEqual(response.status_code, 406)
             self.assertEqual(response.data, {'error': 'Token expired'})
 
-    @patch('jwt_registration.tasks.send_verification_email.delay')
+    @patch('jwt_registration.views.queue_verification_email')
+    def test_verification_is_single_conditional_update(self, mock_send_mail):
+        self.client.post(self.url, self.data_to_post)
+        verification_url = mock_send_mail.call_args.kwargs['message'].split()[-1]
+
+        with self.assertNumQueries(1) as queries:
+            response = self.client.get(verification_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(queries.captured_queries[0]['sql'].startswith('UPDATE'))
+        self.assertIn('not "user_profile_user"."email_verified"', queries.captured_queries[0]['sql'].lower())
+
+        version = cache.get(settings.USER_PROFILE_VERSION_CACHE_KEY.format(user=self.user.id))
+        self.assertIsNotNone(version)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(verification_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'detail': 'Email verified succesfully!'})
+        self.assertEqual(cache.get(settings.USER_PROFILE_VERSION_CACHE_KEY.format(user=self.user.id)), version)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.email_verified)
+
+    @patch('jwt_registration.views.queue_verification_email')
+    def test_verification_of_deleted_user(self, mock_send_mail):
+        self.client.post(self.url, self.data_to_post)
+        verification_url = mock_send_mail.call_args.kwargs['message'].split()[-1]
+        self.user.delete()
+
+        for _ in range(2):
+            response = self.client.get(verification_url)
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual(response.data, {'error': 'User not found'})
+
+    @patch('jwt_registration.views.queue_verification_email')
+    def test_verification_of_user_verified_another_way(self, mock_send_mail):
+        self.client.post(self.url, self.data_to_post)
+        verification_url = mock_send_mail.call_args.kwargs['message'].split()[-1]
+        User.objects.filter(id=self.user.id).update(email_verified=True)
+
+        response = self.client.get(verification_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'detail': 'Email verified succesfully!'})
+
+    def test_verify_signer_is_built_once(self):
+        self.assertIs(get_email_verify_signer(), get_email_verify_signer())
+
+    @patch('jwt_registration.views.queue_verification_email')
+    def test_repeated_request_in_cooldown_is_suppressed(self, mock_send_mail):
+        suppressed = EMAIL_VERIFY_SUPPRESSED._value.get()
+        first = self.client.post(self.url, self.data_to_post)
+        second = self.client.post(self.url, self.data_to_post)
+
+        mock_send_mail.assert_called_once()
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data, first.data)
+        self.assertTrue(0 < int(second['Retry-After']) <= settings.EMAIL_VERIFY_COOLDOWN)
+        self.assertEqual(EMAIL_VERIFY_SUPPRESSED._value.get(), suppressed + 1)
+
+        cache.delete(settings.EMAIL_VERIFY_COOLDOWN_CACHE_KEY.format(user=self.user.id))
+        self.client.post(self.url, self.data_to_post)
+        self.assertEqual(mock_send_mail.call_count, 2)
+
+    @patch('jwt_registration.views.queue_verification_email', side_effect=ConnectionError)
+    def test_failed_enqueue_does_not_start_cooldown(self, mock_send_mail):
+        with self.assertRaises(ConnectionError):
+            self.client.post(self.url, self.data_to_post)
+        self.assertIsNone(cache.get(settings.EMAIL_VERIFY_COOLDOWN_CACHE_KEY.format(user=self.user.id)))
+
+    @patch('jwt_registration.views.queue_verification_email')
     def test_user_does_not_exists(self, mock_send_mail):
         self.data_to_post.update({'email': 'asf@gmail.com'})
         response = self.client.post(self.url, self.data_to_post)
@@ -314,3 +483,28 @@ class EmailVerifyTestCase(APITestCase):
         self.assertEqual(response.status_code, 404)
         self.assertEqual(
             response.data, {'error': 'User with this email does not exist'})
+
+
+class FastValidateTokenTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='test_email@gmail.com', password='password_123', first_name='first', last_name='last')
+        self.refresh = RefreshToken.for_user(self.user)
+        self.url = reverse('token_fast_validate')
+
+    def test_valid_access_token(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.refresh.access_token}')
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {'detail': 'Token is valid'})
+
+    def test_refresh_token_is_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.refresh}')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_missing_header(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.json(), {'error': 'Invalid token'})
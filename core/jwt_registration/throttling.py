@@ -0,0 +1,129 @@
+import time
+import uuid
+from functools import cache
+
+from django.conf import settings
+from loguru import logger
+from redis import RedisError
+from rest_framework.throttling import BaseThrottle
+
+from core.redis_client import get_redis_client, make_redis_key
+
+# KEYS: window, strikes and block key for every scope; ARGV: now, window, backoff base,
+# backoff max, strikes ttl (all in ms), attempt id, then the limit of every scope.
+SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local backoff_base = tonumber(ARGV[3])
+local backoff_max = tonumber(ARGV[4])
+local strikes_ttl = tonumber(ARGV[5])
+local attempt = ARGV[6]
+local retry_after = 0
+
+for scope = 0, #KEYS / 3 - 1 do
+    local window_key = KEYS[scope * 3 + 1]
+    local strikes_key = KEYS[scope * 3 + 2]
+    local block_key = KEYS[scope * 3 + 3]
+    local blocked = redis.call('PTTL', block_key)
+    if blocked > 0 then
+        retry_after = math.max(retry_after, blocked)
+    else
+        redis.call('ZREMRANGEBYSCORE', window_key, '-inf', now - window)
+        if redis.call('ZCARD', window_key) >= tonumber(ARGV[7 + scope]) then
+            local strikes = redis.call('INCR', strikes_key)
+            redis.call('PEXPIRE', strikes_key, strikes_ttl)
+            local backoff = math.floor(math.min(backoff_base * 2 ^ (strikes - 1), backoff_max))
+            redis.call('SET', block_key, 1, 'PX', backoff)
+            redis.call('DEL', window_key)
+            retry_after = math.max(retry_after, backoff)
+        end
+    end
+end
+
+if retry_after > 0 then
+    return retry_after
+end
+for scope = 0, #KEYS / 3 - 1 do
+    redis.call('ZADD', KEYS[scope * 3 + 1], now, attempt)
+    redis.call('PEXPIRE', KEYS[scope * 3 + 1], window)
+end
+return 0
+"""
+
+
+class SlidingWindowLimiter:
+
+    def __init__(self, window: int, backoff_base: int, backoff_max: int, strikes_ttl: int):
+        self.window = window
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.strikes_ttl = strikes_ttl
+
+    def hit(self, limits: dict[str, int]) -> float:
+        keys, args = [], []
+        for scope, limit in limits.items():
+            keys.extend(self._keys(scope))
+            args.append(limit)
+        retry_after = self._script()(keys=keys, args=[
+            int(time.time() * 1000),
+            self.window * 1000,
+            self.backoff_base * 1000,
+            self.backoff_max * 1000,
+            self.strikes_ttl * 1000,
+            uuid.uuid4().hex,
+            *args,
+        ])
+        return retry_after / 1000
+
+    def reset(self, scope: str):
+        try:
+            get_redis_client().delete(*self._keys(scope))
+        except RedisError as e:
+            logger.error(f'Login limiter is unavailable: {e}')
+
+    @staticmethod
+    def _keys(scope):
+        return [
+            make_redis_key(settings.LOGIN_ATTEMPTS_CACHE_KEY.format(scope=scope, kind=kind))
+            for kind in ('window', 'strikes', 'block')
+        ]
+
+    @staticmethod
+    @cache
+    def _script():
+        return get_redis_client().register_script(SLIDING_WINDOW_SCRIPT)
+
+
+@cache
+def get_login_limiter() -> SlidingWindowLimiter:
+    return SlidingWindowLimiter(
+        window=settings.LOGIN_ATTEMPTS_WINDOW,
+        backoff_base=settings.LOGIN_BACKOFF_BASE,
+        backoff_max=settings.LOGIN_BACKOFF_MAX,
+        strikes_ttl=settings.LOGIN_STRIKES_TTL,
+    )
+
+
+def email_scope(email):
+    return f'email:{email.strip().lower()}'
+
+
+def hit_login_limiter(ident, email) -> float:
+    limits = {f'ip:{ident}': settings.LOGIN_ATTEMPTS_PER_IP}
+    if isinstance(email, str) and email:
+        limits[email_scope(email)] = settings.LOGIN_ATTEMPTS_PER_EMAIL
+    try:
+        return get_login_limiter().hit(limits)
+    except RedisError as e:
+        logger.error(f'Login limiter is unavailable: {e}')
+        return 0
+
+
+class LoginAttemptThrottle(BaseThrottle):
+
+    def allow_request(self, request, view):
+        self.retry_after = hit_login_limiter(self.get_ident(request), request.data.get('email'))
+        return self.retry_after == 0
+
+    def wait(self):
+        return self.retry_after
@@ -0,0 +1,110 @@
+import json
+from functools import cache
+
+import jwt
+from django.conf import settings
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from jwt_registration.signing import get_signing_keyset
+
+VALID_TOKEN_BODY = json.dumps({'detail': 'Token is valid'}).encode()
+INVALID_TOKEN_BODY = json.dumps({'error': 'Invalid token'}).encode()
+
+
+class AccessTokenValidator:
+
+    def __init__(self):
+        self._keyset = get_signing_keyset()
+        self.algorithm = self._keyset.algorithm
+        self._header_types = {header_type.encode() for header_type in api_settings.AUTH_HEADER_TYPES}
+        self._options = {
+            'require': ['exp'],
+            'verify_aud': api_settings.AUDIENCE is not None,
+        }
+
+    def validate(self, raw_token: str) -> dict | None:
+        key = self._keyset.verifying_key(raw_token)
+        if key is None:
+            return None
+        try:
+            payload = jwt.decode(
+                raw_token,
+                key,
+                algorithms=[self.algorithm],
+                audience=api_settings.AUDIENCE,
+                issuer=api_settings.ISSUER,
+                leeway=api_settings.LEEWAY,
+                options=self._options,
+            )
+        except jwt.InvalidTokenError:
+            return None
+        if payload.get(api_settings.TOKEN_TYPE_CLAIM) != AccessToken.token_type:
+            return None
+        if api_settings.USER_ID_CLAIM not in payload:
+            return None
+        return payload
+
+    def validate_header(self, header: str | bytes | None) -> dict | None:
+        if not header:
+            return None
+        try:
+            if isinstance(header, str):
+                header = header.encode('iso-8859-1')
+            parts = header.split()
+            if len(parts) != 2 or parts[0] not in self._header_types:
+                return None
+            # A JWT is plain ASCII, anything else cannot be a token we issued.
+            raw_token = parts[1].decode('ascii')
+        except UnicodeError:
+            return None
+        return self.validate(raw_token)
+
+
+@cache
+def get_access_token_validator() -> AccessTokenValidator:
+    return AccessTokenValidator()
+
+
+def validate_authorization_header(header):
+    if get_access_token_validator().validate_header(header) is None:
+        return 401, INVALID_TOKEN_BODY
+    return 200, VALID_TOKEN_BODY
+
+
+class FastTokenValidateApplication:
+
+    def __init__(self, application, path: str | None = None):
+        self.application = application
+        self.path = path or settings.FAST_TOKEN_VALIDATE_PATH
+
+    def __call__(self, environ, start_response):
+        if environ.get('PATH_INFO') != self.path:
+            return self.application(environ, start_response)
+
+        status_code, body = validate_authorization_header(environ.get('HTTP_AUTHORIZATION'))
+        start_response('200 OK' if status_code == 200 else '401 Unauthorized', [
+            ('Content-Type', 'application/json'),
+            ('Content-Length', str(len(body))),
+        ])
+        return [body]
+
+
+class FastTokenValidateASGIApplication:
+
+    def __init__(self, application, path: str | None = None):
+        self.application = application
+        self.path = path or settings.FAST_TOKEN_VALIDATE_PATH
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] != self.path:
+            return await self.application(scope, receive, send)
+
+        header = next((value for name, value in scope['headers'] if name == b'authorization'), None)
+        status_code, body = validate_authorization_header(header)
+        await send({
+            'type': 'http.response.start',
+            'status': status_code,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': body})
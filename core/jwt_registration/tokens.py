@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken as SimpleJWTRefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from jwt_registration.blacklist import get_token_blacklist
+from jwt_registration.bookkeeping import get_outstanding_token_buffer
+
+
+class RefreshToken(SimpleJWTRefreshToken):
+
+    def __init__(self, token=None, verify=True, check_blacklist=True):
+        self._check_blacklist_on_verify = check_blacklist
+        super().__init__(token, verify=verify)
+
+    def verify(self, *args, **kwargs):
+        if self._check_blacklist_on_verify:
+            return super().verify(*args, **kwargs)
+        return super(BlacklistMixin, self).verify(*args, **kwargs)
+
+    def check_blacklist(self):
+        if get_token_blacklist().is_blacklisted(self):
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        return get_token_blacklist().blacklist(self)
+
+    @classmethod
+    def for_user(cls, user):
+        if settings.TOKEN_BOOKKEEPING != 'buffered':
+            return super().for_user(user)
+        token = super(BlacklistMixin, cls).for_user(user)
+        get_outstanding_token_buffer().add(user, token)
+        return token
+
+    @classmethod
+    async def averified(cls, raw_token):
+        token = cls(raw_token, check_blacklist=False)
+        if await get_token_blacklist().ais_blacklisted(token):
+            raise TokenError(_('Token is blacklisted'))
+        return token
+
+    async def ablacklist(self):
+        return await get_token_blacklist().ablacklist(self)
+
+    @classmethod
+    async def afor_user(cls, user):
+        token = super(BlacklistMixin, cls).for_user(user)
+        if settings.TOKEN_BOOKKEEPING == 'buffered':
+            get_outstanding_token_buffer().add(user, token)
+            return token
+        await OutstandingToken.objects.acreate(
+            user=user,
+            jti=token[api_settings.JTI_CLAIM],
+            token=str(token),
+            created_at=token.current_time,
+            expires_at=datetime_from_epoch(token['exp']),
+        )
+        return token
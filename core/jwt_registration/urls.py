@@ -1,8 +1,10 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView, TokenVerifyView
 
+from jwt_registration import async_views
 from jwt_registration.views import (
-    LoginAPIView, RegistrationAPIView, LogoutAPIView, UpdateImportantDataAPIView, EmailVerifyView, IsEmailVerifiedView
+    LoginAPIView, RegistrationAPIView, LogoutAPIView, UpdateImportantDataAPIView, EmailVerifyView, IsEmailVerifiedView,
+    fast_validate_token
 )
 
 urlpatterns = [
@@ -10,10 +12,15 @@ urlpatterns = [
     path('v1/registration/', RegistrationAPIView.as_view(), name='registration'),
     path('v1/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('v1/token/validate/', TokenVerifyView.as_view(), name='token_verify'),
+    path('v1/token/fast-validate/', fast_validate_token, name='token_fast_validate'),
     path('v1/logout/', LogoutAPIView.as_view(), name='logout'),
     path('v1/update-important-data/',
          UpdateImportantDataAPIView.as_view(), name='update_important_data'),
     path('v1/email-verify/', EmailVerifyView.as_view(), name='to_email_verify'),
     path('v1/is-email-verified/<str:token>/',
          IsEmailVerifiedView.as_view(), name='is_email_verified'),
+    path('v1/async/login/', async_views.login, name='async_login'),
+    path('v1/async/token/refresh/', async_views.refresh_token, name='async_token_refresh'),
+    path('v1/async/token/validate/', async_views.validate_token, name='async_token_validate'),
+    path('v1/async/logout/', async_views.logout, name='async_logout'),
 ]
@@ -1,51 +1,96 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import cache
+
+from itsdangerous import URLSafeTimedSerializer
 from loguru import logger
 from rest_framework.exceptions import ValidationError
 from rest_framework_simplejwt.exceptions import TokenError
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.conf import settings
+from django.utils.module_loading import import_string
 from core.exeptions import TwoCommitsError
-import requests
+from jwt_registration.tokens import RefreshToken
+
+REGISTRATION_SELF_PACKAGE = {
+    'company': {
+        'create': 'api/v1/company/registration/users/create/',
+        'confirm': 'api/v1/company/registration/users/confirm/',
+        'rollback': 'api/v1/company/registration/users/rollback/'
+    },
+}
 
 
 class HeadTwoCommitsPattern:
 
-    def __init__(self, data: dict | None, self_package: dict[str]):
+    def __init__(self, data: dict | None, self_package: dict[str], deadline: float | None = None):
         self.data = data
         self.self_package = self_package
+        self.deadline = settings.TWO_COMMITS_DEADLINE if deadline is None else deadline
+        self._expires_at = None
 
     def two_commits_operation(self):
+        self._expires_at = time.monotonic() + self.deadline
+
         creation_statuses_codes = self._create_object()
-        creation_errors = [TwoCommitsError({'error': f'{service} two commits creation problem'}) for
-                           service, status_code in creation_statuses_codes.items() if status_code != 200]
+        creation_errors = [service for service, status_code in creation_statuses_codes.items() if status_code != 200]
         if creation_errors:
             self._rollback_object()
-            raise creation_errors
+            raise TwoCommitsError({'error': f'{", ".join(creation_errors)} two commits creation problem',
+                                   'statuses': creation_statuses_codes})
 
         confirm_statuses_codes = self._confirm_object()
-        confirm_errors = [TwoCommitsError({'error': f'{service} two commits creation problem'}) for
-                          service, status_code in confirm_statuses_codes.items() if status_code != 200]
+        confirm_errors = [service for service, status_code in confirm_statuses_codes.items() if status_code != 200]
         if confirm_errors:
             self._rollback_object()
-            raise confirm_errors
+            raise TwoCommitsError({'error': f'{", ".join(confirm_errors)} two commits confirmation problem',
+                                   'statuses': confirm_statuses_codes})
 
     def _create_object(self):
-        company_response = requests.post(
-            url=settings.COMPANY_SERVICE_URL.format(self.self_package['company']['create']), data=self.data)
-        statuses_codes = {
-            'company': company_response.status_code
-        }
-        return statuses_codes
+        return self._fan_out('create', self._remaining())
 
     def _confirm_object(self):
-        company_response = requests.post(
-            url=settings.COMPANY_SERVICE_URL.format(self.self_package['company']['confirm']), data=self.data)
-        statuses_codes = {
-            'company': company_response.status_code
+        return self._fan_out('confirm', self._remaining())
+
+    def _rollback_object(self):
+        return self._fan_out('rollback', self.deadline)
+
+    def _remaining(self):
+        if self._expires_at is None:
+            return self.deadline
+        return max(self._expires_at - time.monotonic(), 0)
+
+    def _fan_out(self, action, timeout):
+        futures = {
+            get_two_commits_executor().submit(self._send, service, paths[action]): service
+            for service, paths in self.self_package.items()
         }
+        _, not_done = wait(futures, timeout=timeout)
+
+        statuses_codes = {}
+        for future, service in futures.items():
+            statuses_codes[service] = None
+            if future in not_done:
+                future.cancel()
+                logger.warning(f"{service} two commits {action} missed the {self.deadline}s deadline")
+            elif future.exception() is not None:
+                logger.warning(f"{service} two commits {action} failed: {future.exception()!r}")
+            else:
+                statuses_codes[service] = future.result()
         return statuses_codes
 
-    def _rollback_object(self):
-        requests.post(url=settings.COMPANY_SERVICE_URL.format(self.self_package['company']['rollback']), data=self.data)
+    def _send(self, service, path):
+        client = import_string(settings.TWO_COMMITS_SERVICE_CLIENTS[service])()
+        return client.post(path, data=self.data).status_code
+
+
+@cache
+def get_two_commits_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=settings.TWO_COMMITS_WORKERS, thread_name_prefix='two-commits')
+
+
+@cache
+def get_outbox_dispatch_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=settings.OUTBOX_DISPATCH_WORKERS, thread_name_prefix='outbox-dispatch')
 
 
 def put_token_on_blacklist(refresh_token):
@@ -55,3 +100,8 @@ def put_token_on_blacklist(refresh_token):
     except TokenError as e:
         logger.critical(f"TokenError: {e}. It might be a potential security threat.")
         raise ValidationError({'error': 'Invalid refresh token'})
+
+
+@cache
+def get_email_verify_signer() -> URLSafeTimedSerializer:
+    return URLSafeTimedSerializer(secret_key=settings.SECRET_KEY, salt='email-verify')
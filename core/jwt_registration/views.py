@@ -1,4 +1,10 @@
-from django.contrib.auth import authenticate
+import hashlib
+from functools import partial
+
+from django.http import HttpResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET
 from drf_spectacular.utils import extend_schema
 from rest_framework import status
 from rest_framework.exceptions import ValidationError, AuthenticationFailed
@@ -6,41 +12,60 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from rest_framework_simplejwt.tokens import RefreshToken, AccessToken
 
+from core.metrics import EMAIL_VERIFY_SUPPRESSED
+from core.redis_client import get_redis_client, make_redis_key
 from core.swagger_info import *
+from jwt_registration.hashing import authenticate_user, check_user_password
+from jwt_registration.idempotency import email_lock, get_idempotency_key, get_stored_response, request_fingerprint, store_response
 from jwt_registration.serializers import UserImportantSerializer
-from jwt_registration.utils import put_token_on_blacklist, HeadTwoCommitsPattern
+from jwt_registration.signing import get_jwks_body
+from jwt_registration.models import OutboxMessage
+from jwt_registration.utils import put_token_on_blacklist, get_email_verify_signer, REGISTRATION_SELF_PACKAGE
 from django.db import transaction
 from django.core.mail import send_mail
 from django.conf import settings
+from django.core.cache import cache
 from django.urls import reverse
 from user_profile.models import User
-from jwt_registration.tasks import send_verification_email
-from itsdangerous import URLSafeTimedSerializer, SignatureExpired, BadSignature
+from user_profile.profile_cache import bump_profile_version
+from jwt_registration.tasks import queue_verification_email, schedule_outbox_dispatch
+from jwt_registration.throttling import LoginAttemptThrottle, get_login_limiter, email_scope
+from jwt_registration.tokens import RefreshToken
+from jwt_registration.token_validation import get_access_token_validator, VALID_TOKEN_BODY, INVALID_TOKEN_BODY
+from itsdangerous import SignatureExpired, BadSignature
 
 
 class RegistrationAPIView(APIView):
 
-    @extend_schema(request=UserImportantSerializer, responses=response_for_registration)
+    @extend_schema(request=UserImportantSerializer, responses=response_for_registration,
+                   parameters=parameters_for_registration)
     def post(self, request):
+        idempotency_key = get_idempotency_key(request)
+        fingerprint = request_fingerprint(request.data)
+        if idempotency_key and (response := get_stored_response(idempotency_key, fingerprint)):
+            return response
+
+        with email_lock(request.data.get('email')):
+            if idempotency_key and (response := get_stored_response(idempotency_key, fingerprint)):
+                return response
+            response = self._register(request)
+            if idempotency_key and response.status_code == status.HTTP_201_CREATED:
+                store_response(idempotency_key, fingerprint, response)
+        return response
+
+    def _register(self, request):
         serializer = UserImportantSerializer(data=request.data)
         if serializer.is_valid():
             with transaction.atomic():
                 user = serializer.save()
-                head = HeadTwoCommitsPattern(
-                    data={
+                message = OutboxMessage.objects.create(
+                    payload={
                         'email': user.email,
                     },
-                    self_package={
-                        'company': {
-                            'create': 'api/v1/company/registration/users/create/',
-                            'confirm': 'api/v1/company/registration/users/confirm/',
-                            'rollback': 'api/v1/company/registration/users/rollback/'
-                        },
-                    }
+                    self_package=REGISTRATION_SELF_PACKAGE,
                 )
-                head.two_commits_operation()
+                transaction.on_commit(partial(schedule_outbox_dispatch, message.id))
 
             refresh = RefreshToken.for_user(user)
             refresh.payload.update({
@@ -56,6 +81,7 @@ class RegistrationAPIView(APIView):
 
 
 class LoginAPIView(APIView):
+    throttle_classes = (LoginAttemptThrottle,)
 
     @extend_schema(request=request_for_login, responses=response_for_login)
     def post(self, request):
@@ -65,10 +91,11 @@ class LoginAPIView(APIView):
         if email is None or password is None:
             raise ValidationError({'error': 'Email and password are required'})
 
-        user = authenticate(email=email, password=password)
+        user = authenticate_user(email, password)
         if user is None:
             raise AuthenticationFailed(
                 {'error': 'Incorrect username or password'})
+        get_login_limiter().reset(email_scope(email))
         refresh = RefreshToken.for_user(user)
         refresh.payload.update({
             'user_id': user.id,
@@ -108,6 +135,7 @@ class UpdateImportantDataAPIView(APIView):
         if serializer.is_valid():
             put_token_on_blacklist(old_refresh_token)
             user = serializer.save()
+            bump_profile_version(user.id)
             refresh = RefreshToken.for_user(user)
             return Response(
                 {
@@ -125,7 +153,7 @@ class UpdateImportantDataAPIView(APIView):
             raise ValidationError({'error': 'Refresh token is required'})
         if not current_password:
             raise ValidationError({'error': 'Current password is required'})
-        if not request.user.check_password(current_password):
+        if not check_user_password(request.user, current_password):
             raise ValidationError({'error': 'Current password is incorrect'})
 
 
@@ -147,22 +175,27 @@ class EmailVerifyView(APIView):
         if user.email_verified:
             return Response({'detail': 'Email is already verified.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        token_ser = URLSafeTimedSerializer(
-            secret_key=settings.SECRET_KEY)
-        token = token_ser.dumps(
-            {'user_id': user.id}, salt='email-verify')
+        cooldown_key = settings.EMAIL_VERIFY_COOLDOWN_CACHE_KEY.format(user=user.id)
+        if not cache.add(cooldown_key, 1, timeout=settings.EMAIL_VERIFY_COOLDOWN):
+            EMAIL_VERIFY_SUPPRESSED.inc()
+            retry_after = get_redis_client().ttl(make_redis_key(cooldown_key))
+            return Response({'detail': 'We sent mail on your email to verification'}, status=status.HTTP_200_OK,
+                            headers={'Retry-After': str(max(retry_after, 1))})
+
+        token = get_email_verify_signer().dumps({'user_id': user.id})
 
         verification_url = 'http://92.63.67.98:8000' + reverse('is_email_verified',
                                                                kwargs={'token': token})
-        send_verification_email.delay(
-            subject='Verify your email!',
-            message=f'To verify your email on QuickHub follow the link:\n{
-                verification_url}',
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user_email],
-            auth_user=settings.EMAIL_HOST_USER,
-            auth_password=settings.EMAIL_HOST_PASSWORD
-        )
+        try:
+            queue_verification_email(
+                subject='Verify your email!',
+                message=f'To verify your email on QuickHub follow the link:\n{
+                    verification_url}',
+                recipient=user_email,
+            )
+        except Exception:
+            cache.delete(cooldown_key)
+            raise
 
         return Response({'detail': 'We sent mail on your email to verification'}, status=status.HTTP_200_OK)
 
@@ -174,19 +207,34 @@ class IsEmailVerifiedView(APIView):
     @extend_schema(request=['token'], responses=[200])
     def get(self, request, token):
         try:
-            decoded_token_ser = URLSafeTimedSerializer(
-                secret_key=settings.SECRET_KEY)
-            decoded_token = decoded_token_ser.loads(
-                token, salt='email-verify', max_age=60*60)
+            decoded_token = get_email_verify_signer().loads(token, max_age=settings.EMAIL_VERIFY_TOKEN_MAX_AGE)
         except SignatureExpired:
             return Response({'error': 'Token expired'}, status=status.HTTP_406_NOT_ACCEPTABLE)
         except BadSignature:
             return Response({'error': 'Invalid token'}, status=status.HTTP_406_NOT_ACCEPTABLE)
 
-        user_id = decoded_token['user_id']
-        user = User.objects.get(id=user_id)
-
-        user.email_verified = True
-        user.save()
+        consumed_key = settings.EMAIL_VERIFY_CONSUMED_CACHE_KEY.format(token=hashlib.sha256(token.encode()).hexdigest())
+        # Claiming the token first keeps a concurrent click with the same link off the update path.
+        if cache.add(consumed_key, 1, timeout=settings.EMAIL_VERIFY_TOKEN_MAX_AGE):
+            user_id = decoded_token['user_id']
+            if User.objects.filter(id=user_id, email_verified=False).update(email_verified=True):
+                bump_profile_version(user_id)
+            elif not User.objects.filter(id=user_id).exists():
+                cache.delete(consumed_key)
+                return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
 
         return Response({'detail': 'Email verified succesfully!'}, status=status.HTTP_200_OK)
+
+
+@csrf_exempt
+def fast_validate_token(request):
+    payload = get_access_token_validator().validate_header(request.headers.get('Authorization'))
+    if payload is None:
+        return HttpResponse(INVALID_TOKEN_BODY, content_type='application/json', status=status.HTTP_401_UNAUTHORIZED)
+    return HttpResponse(VALID_TOKEN_BODY, content_type='application/json', status=status.HTTP_200_OK)
+
+
+@require_GET
+@cache_control(public=True, max_age=settings.JWKS_MAX_AGE)
+def jwks(request):
+    return HttpResponse(get_jwks_body(), content_type='application/json')
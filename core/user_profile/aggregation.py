@@ -0,0 +1,47 @@
+from user_profile.models import User
+from user_profile.serializers import ProfileUserForDepSerializer
+
+# model_to_dict, which these endpoints used to build rows with, leaves out non-editable fields such as
+# image_identifier; the projection keeps the response unchanged.
+DEPARTMENT_PROFILE_FIELDS = tuple(
+    field for field in ProfileUserForDepSerializer.Meta.fields if User._meta.get_field(field).editable
+)
+
+
+def profiles_by_email(emails):
+    return {
+        profile['email']: profile
+        for profile in User.objects.filter(email__in=set(emails)).values(*DEPARTMENT_PROFILE_FIELDS)
+    }
+
+
+def merge_department_profiles(departments):
+    members = [user for department in departments for user in department['users']]
+    profiles = profiles_by_email(user['email'] for user in members)
+    for user in members:
+        profile = profiles.get(user['email'])
+        if profile is not None:
+            user.update(profile)
+    return departments
+
+
+def positions_departments_by_email(company_users):
+    index = {}
+    for user in company_users:
+        email = user.get('email')
+        positions, departments = user.get('positions'), user.get('departments')
+        if email in index:
+            # The same member listed twice keeps the roles of both entries.
+            positions = _merge_by_id(index[email][0], positions)
+            departments = _merge_by_id(index[email][1], departments)
+        index[email] = (positions, departments)
+    return index
+
+
+def _merge_by_id(first, second):
+    if not second:
+        return first
+    if not first:
+        return second
+    seen = {item.get('id') for item in first}
+    return first + [item for item in second if item.get('id') not in seen]
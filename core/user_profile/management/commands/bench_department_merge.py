@@ -0,0 +1,63 @@
+import copy
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.forms.models import model_to_dict
+
+from user_profile.aggregation import merge_department_profiles
+from user_profile.models import User
+from user_profile.serializers import ProfileUserForDepSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compare the nested-loop and email-indexed department merges on synthetic companies'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, nargs='+', default=[100, 1000, 10000])
+        parser.add_argument('--departments', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{"members":>8} {"nested loop":>12} {"indexed":>12} {"speedup":>8}')
+        for members in options['members']:
+            with transaction.atomic():
+                departments = self._company(members, options['departments'])
+                legacy = self._measure(self._legacy_merge, departments, options['repeat'])
+                indexed = self._measure(merge_department_profiles, departments, options['repeat'])
+                transaction.set_rollback(True)
+            self.stdout.write(f'{members:>8} {legacy:>10.1f}ms {indexed:>10.1f}ms {legacy / indexed:>7.1f}x')
+
+    @staticmethod
+    def _company(members, departments):
+        users = User.objects.bulk_create(
+            User(email=f'bench-{i}@example.com', first_name=f'first {i}', last_name=f'last {i}')
+            for i in range(members)
+        )
+        company = [{'id': i, 'users': []} for i in range(departments)]
+        for i, user in enumerate(users):
+            company[i % departments]['users'].append({'id': user.id, 'email': user.email})
+        return company
+
+    @staticmethod
+    def _measure(merge, departments, repeat):
+        timings = []
+        for _ in range(repeat):
+            data = copy.deepcopy(departments)
+            start = time.perf_counter()
+            merge(data)
+            timings.append((time.perf_counter() - start) * 1000)
+        return min(timings)
+
+    @staticmethod
+    def _legacy_merge(departments):
+        users_emails = [user['email'] for department in departments for user in department['users']]
+        users_info = [model_to_dict(user, fields=ProfileUserForDepSerializer.Meta.fields)
+                      for user in User.objects.filter(email__in=users_emails)]
+        for department in departments:
+            for user in department['users']:
+                for user_info in users_info:
+                    if user['email'] == user_info['email']:
+                        user.update(user_info)
+                        break
+        return departments
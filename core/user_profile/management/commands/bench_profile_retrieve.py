@@ -0,0 +1,35 @@
+import statistics
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.benchmarking import measure, report
+from user_profile.models import User
+from user_profile.profile_cache import bump_profile_version
+
+
+class Command(BaseCommand):
+    help = 'Compare profile retrieve latency with a cold and a warm rendered response cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user-id', type=int)
+        parser.add_argument('--iterations', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(id=options['user_id']) if options['user_id'] else User.objects.order_by('id')
+        user = user.first()
+        if user is None:
+            raise CommandError('No user to fetch the profile of')
+
+        client = Client(HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        url = reverse('user-detail', args=[user.id])
+
+        cold = measure(lambda: client.get(url), options['iterations'],
+                   before=lambda: bump_profile_version(user.id))
+        warm = measure(lambda: client.get(url), options['iterations'])
+
+        report(self.stdout, 'cold (serialize)', cold, width=18)
+        report(self.stdout, 'warm (cached)', warm, width=18)
+        self.stdout.write(f'speedup (mean): {statistics.mean(cold) / statistics.mean(warm):.1f}x')
@@ -0,0 +1,323 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import cache
+
+from django.conf import settings
+from loguru import logger
+from redis import RedisError
+
+from core.metrics import PROFILE_CACHE_BYTES, PROFILE_CACHE_EVICTIONS, PROFILE_CACHE_REQUESTS
+from core.redis_client import get_redis_client, make_redis_key
+
+# A missing version counter is seeded from the clock rather than starting at 0, so a counter that expired or was
+# evicted never comes back with a value an old ETag or cached body was issued for.
+# KEYS: version counter, rendered body key without the version suffix; ARGV: seed, counter ttl.
+# Returns {version, body or false}; reading both in one script keeps a cache hit at a single round trip.
+PROFILE_CACHE_SCRIPT = """
+local version = redis.call('GET', KEYS[1])
+if not version then
+    version = ARGV[1]
+    redis.call('SET', KEYS[1], version, 'EX', ARGV[2])
+end
+return {version, redis.call('GET', KEYS[2] .. version)}
+"""
+
+# KEYS: version counters; ARGV: seed, counter ttl. Returns the versions in KEYS order.
+PROFILE_VERSIONS_SCRIPT = """
+local versions = {}
+for i, key in ipairs(KEYS) do
+    local version = redis.call('GET', key)
+    if not version then
+        version = ARGV[1]
+        redis.call('SET', key, version, 'EX', ARGV[2])
+    end
+    versions[i] = version
+end
+return versions
+"""
+
+# KEYS: version counters; ARGV: the body key prefixes in KEYS order.
+# Returns version (or false) and body (or false) pairs flattened in KEYS order. Counters are only read here, so ids
+# that do not belong to any user never leave keys behind.
+PROFILE_BATCH_SCRIPT = """
+local result = {}
+for i, key in ipairs(KEYS) do
+    local version = redis.call('GET', key)
+    result[2 * i - 1] = version
+    result[2 * i] = version and redis.call('GET', ARGV[i] .. version)
+end
+return result
+"""
+
+# KEYS: version counters; ARGV: seed, counter ttl, then body key prefix and body pairs in KEYS order.
+# A body is stored only where this call created the counter. A counter that appeared after the body was rendered may
+# already have been bumped by an update the body does not include.
+PROFILE_BATCH_SEED_SCRIPT = """
+for i, key in ipairs(KEYS) do
+    if redis.call('SET', key, ARGV[1], 'NX', 'EX', ARGV[2]) then
+        redis.call('SET', ARGV[2 * i + 1] .. ARGV[1], ARGV[2 * i + 2], 'EX', ARGV[2])
+    end
+end
+return 0
+"""
+
+
+class LocalProfileCache:
+
+    def __init__(self, max_entries: int, ttl: float, channel: str):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.channel = channel
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._generation = 0
+        self._subscribed = False
+        self._lock = threading.Lock()
+        self._pid = None
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def get(self, user_id):
+        with self._lock:
+            self._ensure_subscriber()
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] <= time.monotonic():
+                self._pop(user_id, 'expired')
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(user_id)
+        PROFILE_CACHE_REQUESTS.labels('local', 'miss' if entry is None else 'hit').inc()
+        return None if entry is None else entry[1:]
+
+    def set(self, user_id, version: int, body: bytes, generation: int):
+        # An invalidation may have arrived while the body was being fetched; storing it then could
+        # pin a stale profile until the TTL runs out.
+        with self._lock:
+            if not self._subscribed or generation != self._generation:
+                return
+            if user_id in self._entries:
+                self._pop(user_id)
+            self._entries[user_id] = (time.monotonic() + self.ttl, version, body)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries:
+                self._pop(next(iter(self._entries)), 'size')
+            PROFILE_CACHE_BYTES.labels('local').set(self._bytes)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._generation += 1
+            if user_id in self._entries:
+                self._pop(user_id, 'invalidated')
+                PROFILE_CACHE_BYTES.labels('local').set(self._bytes)
+
+    def clear(self, subscribed: bool):
+        with self._lock:
+            self._generation += 1
+            self._subscribed = subscribed
+            self._entries.clear()
+            self._bytes = 0
+            PROFILE_CACHE_BYTES.labels('local').set(0)
+
+    def _pop(self, user_id, reason=None):
+        _, _, body = self._entries.pop(user_id)
+        self._bytes -= len(body)
+        if reason:
+            PROFILE_CACHE_EVICTIONS.labels('local', reason).inc()
+
+    def _ensure_subscriber(self):
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._subscribed = False
+        self._entries.clear()
+        self._bytes = 0
+        threading.Thread(target=self._listen, name='profile-cache-invalidator', daemon=True).start()
+
+    def _listen(self):
+        while True:
+            try:
+                with get_redis_client().pubsub(ignore_subscribe_messages=True) as pubsub:
+                    pubsub.subscribe(self.channel)
+                    # Whatever was published before the subscription went through is lost, start empty.
+                    self.clear(subscribed=True)
+                    for message in pubsub.listen():
+                        self.invalidate(message['data'].decode())
+            except RedisError as e:
+                logger.error(f'Profile cache invalidation channel is unavailable: {e}')
+                self.clear(subscribed=False)
+                time.sleep(1)
+
+
+def get_profile(user_id, render):
+    user_id = str(user_id)
+    local = get_local_profile_cache()
+    if local is not None:
+        entry = local.get(user_id)
+        if entry is not None:
+            return entry
+        generation = local.generation
+
+    version, body = _get_from_redis(user_id)
+    if body is None:
+        body = render()
+        _store_in_redis(user_id, version, body)
+    if local is not None and version is not None:
+        local.set(user_id, version, body, generation)
+    return version, body
+
+
+def get_profile_version(user_id):
+    local = get_local_profile_cache()
+    entry = None if local is None else local.get(str(user_id))
+    if entry is not None:
+        return entry[0]
+    versions = get_profile_versions([user_id])
+    return None if versions is None else versions[str(user_id)]
+
+
+def get_profile_versions(user_ids):
+    user_ids = [str(user_id) for user_id in user_ids]
+    try:
+        versions = _script(PROFILE_VERSIONS_SCRIPT)(
+            keys=[_version_key(user_id) for user_id in user_ids], args=[_seed(), settings.CACHE_LIVE_TIME])
+    except RedisError as e:
+        logger.error(f'Profile cache is unavailable: {e}')
+        return None
+    return {user_id: int(version) for user_id, version in zip(user_ids, versions)}
+
+
+def get_batch_profiles(user_ids, render):
+    user_ids = [str(user_id) for user_id in user_ids]
+    try:
+        result = _script(PROFILE_BATCH_SCRIPT)(
+            keys=[_version_key(user_id) for user_id in user_ids],
+            args=[_batch_body_key(user_id, '') for user_id in user_ids],
+        )
+        versions = {user_id: int(version) for user_id, version in zip(user_ids, result[::2]) if version is not None}
+        bodies = {user_id: body for user_id, body in zip(user_ids, result[1::2]) if body is not None}
+        unversioned = set(user_ids) - versions.keys()
+    except RedisError as e:
+        logger.error(f'Profile cache is unavailable: {e}')
+        versions, bodies, unversioned = {}, {}, set()
+
+    missing = [user_id for user_id in user_ids if user_id not in bodies]
+    PROFILE_CACHE_REQUESTS.labels('redis', 'hit').inc(len(bodies))
+    PROFILE_CACHE_REQUESTS.labels('redis', 'miss').inc(len(missing))
+    if missing:
+        rendered = render(missing)
+        _store_many_in_redis([
+            (user_id, versions[user_id], body) for user_id, body in rendered.items() if user_id in versions
+        ])
+        # Only ids that turned out to be users get a counter.
+        _seed_many_in_redis([(user_id, body) for user_id, body in rendered.items() if user_id in unversioned])
+        bodies.update(rendered)
+    return [bodies[user_id] for user_id in user_ids if user_id in bodies]
+
+
+def bump_profile_version(user_id):
+    user_id = str(user_id)
+    local = get_local_profile_cache()
+    if local is not None:
+        local.invalidate(user_id)
+    try:
+        with get_redis_client().pipeline(transaction=False) as pipe:
+            pipe.set(_version_key(user_id), _seed(), ex=settings.CACHE_LIVE_TIME, nx=True)
+            pipe.incr(_version_key(user_id))
+            pipe.expire(_version_key(user_id), settings.CACHE_LIVE_TIME)
+            pipe.publish(_channel(), user_id)
+            pipe.execute()
+    except RedisError as e:
+        logger.error(f'Profile cache version for user {user_id} was not bumped: {e}')
+        return
+    PROFILE_CACHE_EVICTIONS.labels('redis', 'invalidated').inc()
+
+
+def _get_from_redis(user_id):
+    try:
+        version, body = _script(PROFILE_CACHE_SCRIPT)(
+            keys=[_version_key(user_id), _body_key(user_id, '')], args=[_seed(), settings.CACHE_LIVE_TIME])
+    except RedisError as e:
+        logger.error(f'Profile cache is unavailable: {e}')
+        return None, None
+    PROFILE_CACHE_REQUESTS.labels('redis', 'miss' if body is None else 'hit').inc()
+    return int(version), body
+
+
+def _store_in_redis(user_id, version, body: bytes):
+    if version is None:
+        return
+    try:
+        with get_redis_client().pipeline(transaction=False) as pipe:
+            pipe.set(_body_key(user_id, version), body, ex=settings.CACHE_LIVE_TIME)
+            pipe.expire(_version_key(user_id), settings.CACHE_LIVE_TIME, gt=True)
+            pipe.execute()
+    except RedisError as e:
+        logger.error(f'Profile cache is unavailable: {e}')
+
+
+def _store_many_in_redis(entries):
+    if not entries:
+        return
+    try:
+        with get_redis_client().pipeline(transaction=False) as pipe:
+            for user_id, version, body in entries:
+                pipe.set(_batch_body_key(user_id, version), body, ex=settings.CACHE_LIVE_TIME)
+                pipe.expire(_version_key(user_id), settings.CACHE_LIVE_TIME, gt=True)
+            pipe.execute()
+    except RedisError as e:
+        logger.error(f'Profile cache is unavailable: {e}')
+
+
+def _seed_many_in_redis(entries):
+    if not entries:
+        return
+    try:
+        _script(PROFILE_BATCH_SEED_SCRIPT)(
+            keys=[_version_key(user_id) for user_id, _ in entries],
+            args=[
+                _seed(), settings.CACHE_LIVE_TIME,
+                *(value for user_id, body in entries for value in (_batch_body_key(user_id, ''), body)),
+            ],
+        )
+    except RedisError as e:
+        logger.error(f'Profile cache is unavailable: {e}')
+
+
+def _version_key(user_id):
+    return make_redis_key(settings.USER_PROFILE_VERSION_CACHE_KEY.format(user=user_id))
+
+
+def _body_key(user_id, version):
+    return make_redis_key(settings.USER_PROFILE_CACHE_KEY.format(user=user_id, version=version))
+
+
+def _batch_body_key(user_id, version):
+    return make_redis_key(settings.USER_PROFILE_BATCH_CACHE_KEY.format(user=user_id, version=version))
+
+
+def _channel():
+    return make_redis_key(settings.USER_PROFILE_INVALIDATION_CHANNEL)
+
+
+def _seed():
+    return time.time_ns() // 1000
+
+
+@cache
+def _script(source):
+    return get_redis_client().register_script(source)
+
+
+@cache
+def get_local_profile_cache():
+    if not settings.PROFILE_LOCAL_CACHE_SIZE:
+        return None
+    return LocalProfileCache(
+        max_entries=settings.PROFILE_LOCAL_CACHE_SIZE,
+        ttl=settings.PROFILE_LOCAL_CACHE_TTL,
+        channel=_channel(),
+    )
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.core.files import File
 from django.core.files.storage import FileSystemStorage
 from rest_framework import serializers
@@ -160,14 +161,36 @@ class ProfileUserForCompanySerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        emails = self.context.get('emails', [])
-        pos_deps = self.context.get('pos_deps', [])
-        idx = emails.index(instance.email)
-        representation['positions'] = pos_deps[idx][0]
-        representation['departments'] = pos_deps[idx][1]
-
+        positions_departments = self.context.get('positions_departments', {})
+        if instance.email in positions_departments:
+            representation['positions'], representation['departments'] = positions_departments[instance.email]
         return representation
 
+
+class ProfileUserBatchSerializer(serializers.ModelSerializer):
+    links = LinkSerializer(many=True, required=False)
+
+    class Meta:
+        model = User
+        fields = (
+            'id', 'email', 'first_name', 'last_name', 'otchestwo', 'birthday',
+            'phone', 'business_phone', 'city', 'image_identifier', 'date_joined', 'links',
+        )
+
+
+class ProfileBatchSerializer(serializers.Serializer):
+    emails = serializers.ListField(child=serializers.EmailField(), required=False)
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+
+    def validate(self, attrs):
+        if ('emails' in attrs) == ('ids' in attrs):
+            raise serializers.ValidationError('Pass either emails or ids')
+        values = attrs.get('emails', attrs.get('ids'))
+        if len(values) > settings.PROFILE_BATCH_MAX_SIZE:
+            raise serializers.ValidationError(f'At most {settings.PROFILE_BATCH_MAX_SIZE} profiles per request')
+        return attrs
+
+
 class ImageSerializer(serializers.Serializer):
     image = serializers.ImageField(required=True, write_only=True)
     user = serializers.IntegerField(required=True, write_only=True)
@@ -0,0 +1,28 @@
+from user_profile.aggregation import merge_department_profiles, positions_departments_by_email
+from .test_base import Settings
+
+
+class MergeDepartmentProfilesTestCase(Settings):
+
+    def test_member_of_several_departments_is_loaded_once(self):
+        departments = [
+            {'id': 1, 'users': [{'id': 2, 'email': self.user.email}, {'id': 3, 'email': 'missing@example.com'}]},
+            {'id': 2, 'users': [{'id': 2, 'email': self.user.email}]},
+        ]
+        with self.assertNumQueries(1):
+            merge_department_profiles(departments)
+
+        self.assertEqual(departments[0]['users'][0]['first_name'], self.user.first_name)
+        self.assertEqual(departments[1]['users'][0]['first_name'], self.user.first_name)
+        self.assertEqual(departments[0]['users'][1], {'id': 3, 'email': 'missing@example.com'})
+
+    def test_duplicate_company_entries_are_merged(self):
+        index = positions_departments_by_email([
+            {'email': 'a@example.com', 'positions': [{'id': 1}], 'departments': None},
+            {'email': 'b@example.com', 'positions': [], 'departments': [{'id': 7}]},
+            {'email': 'a@example.com', 'positions': [{'id': 1}, {'id': 2}], 'departments': [{'id': 3}]},
+        ])
+        self.assertEqual(index, {
+            'a@example.com': ([{'id': 1}, {'id': 2}], [{'id': 3}]),
+            'b@example.com': ([], [{'id': 7}]),
+        })
@@ -0,0 +1,22 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from user_profile.models import User
+from .test_base import Settings
+
+
+class BenchCommandsTestCase(Settings):
+
+    def test_reports_cold_and_warm_timings(self):
+        stdout = StringIO()
+        call_command('bench_profile_retrieve', f'--user-id={self.user.id}', '--iterations=2', stdout=stdout)
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual([line.split()[0] for line in lines], ['cold', 'warm', 'speedup'])
+
+    def test_department_merge_reports_every_size(self):
+        stdout = StringIO()
+        call_command('bench_department_merge', '--members', '3', '5', '--departments=2', '--repeat=1', stdout=stdout)
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual([line.split()[0] for line in lines], ['members', '3', '5'])
+        self.assertFalse(User.objects.filter(email__startswith='bench-').exists())
@@ -0,0 +1,84 @@
+import time
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core.redis_client import get_redis_client
+from user_profile.profile_cache import LocalProfileCache, bump_profile_version, get_profile, get_profile_version
+
+
+class LocalProfileCacheTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.local = LocalProfileCache(max_entries=2, ttl=60, channel='test_profile_invalidate')
+        patcher = patch.object(self.local, '_ensure_subscriber')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.local.clear(subscribed=True)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        for user_id in ('1', '2'):
+            self.local.set(user_id, 1, b'{}', self.local.generation)
+        self.local.get('1')
+        self.local.set('3', 1, b'{}', self.local.generation)
+
+        self.assertIsNone(self.local.get('2'))
+        self.assertEqual(self.local.get('1'), (1, b'{}'))
+        self.assertEqual(self.local.get('3'), (1, b'{}'))
+        self.assertEqual(self.local._bytes, 4)
+
+    def test_expired_entry_is_a_miss(self):
+        self.local.ttl = 0
+        self.local.set('1', 1, b'{}', self.local.generation)
+        self.assertIsNone(self.local.get('1'))
+        self.assertEqual(self.local._bytes, 0)
+
+    def test_body_fetched_before_an_invalidation_is_not_stored(self):
+        generation = self.local.generation
+        self.local.invalidate('1')
+        self.local.set('1', 1, b'{}', generation)
+        self.assertIsNone(self.local.get('1'))
+
+    def test_nothing_is_stored_while_unsubscribed(self):
+        self.local.clear(subscribed=False)
+        self.local.set('1', 1, b'{}', self.local.generation)
+        self.assertIsNone(self.local.get('1'))
+
+    def test_local_hit_skips_redis(self):
+        render = MagicMock(return_value=b'{"id": 1}')
+        with patch('user_profile.profile_cache.get_local_profile_cache', return_value=self.local), \
+                patch('user_profile.profile_cache._get_from_redis', return_value=(7, None)) as get_from_redis:
+            self.assertEqual(get_profile(1, render), (7, b'{"id": 1}'))
+            self.assertEqual(get_profile(1, render), (7, b'{"id": 1}'))
+            self.assertEqual(get_profile_version(1), 7)
+        render.assert_called_once()
+        get_from_redis.assert_called_once()
+
+    def test_bump_invalidates_local_entry(self):
+        self.local.set('1', 1, b'{}', self.local.generation)
+        with patch('user_profile.profile_cache.get_local_profile_cache', return_value=self.local):
+            bump_profile_version(1)
+        self.assertIsNone(self.local.get('1'))
+
+
+class ProfileInvalidationChannelTestCase(SimpleTestCase):
+
+    def test_published_invalidation_evicts_entry(self):
+        cache.clear()
+        local = LocalProfileCache(max_entries=10, ttl=60, channel='test_profile_invalidate')
+        local.get('1')
+        self._wait(lambda: local._subscribed)
+        local.set('1', 1, b'{}', local.generation)
+        self.assertEqual(local.get('1'), (1, b'{}'))
+
+        get_redis_client().publish('test_profile_invalidate', '1')
+        self._wait(lambda: '1' not in local._entries)
+
+    @staticmethod
+    def _wait(condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                raise AssertionError('condition was not met in time')
+            time.sleep(0.01)
@@ -1,6 +1,6 @@
 from django.urls import reverse, resolve
 
-from user_profile.views import ProfileAPIVewSet, ImageAPIView
+from user_profile.views import ProfileAPIVewSet, ImageAPIView, ProfileBatchAPIView, CompanyCacheInvalidateAPIView
 from .test_base import Settings
 
 
@@ -13,3 +13,11 @@ class ProfileAPIRouterTestCase(Settings):
     def test_update_important_data_url_is_resolve(self):
         url = reverse('load_image')
         self.assertEqual(resolve(url).func.view_class, ImageAPIView)
+
+    def test_profile_batch_url_is_resolve(self):
+        url = reverse('profile_batch')
+        self.assertEqual(resolve(url).func.view_class, ProfileBatchAPIView)
+
+    def test_company_cache_invalidate_url_is_resolve(self):
+        url = reverse('company_cache_invalidate', kwargs={'company_pk': 1})
+        self.assertEqual(resolve(url).func.view_class, CompanyCacheInvalidateAPIView)
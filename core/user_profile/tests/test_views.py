@@ -1,27 +1,34 @@
+import json
 import shutil
 import tempfile
+import time
 from io import BytesIO
 from unittest.mock import patch, MagicMock
 import requests
 
 from PIL import Image
+from redis import RedisError
 
 from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient, APIRequestFactory
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from core.redis_client import get_redis_client, make_redis_key
 from user_profile.serializers import ProfileUserForCompanySerializer
 from user_profile.models import User
+from user_profile.profile_cache import bump_profile_version
 from .test_base import Settings, mock_upload_file
-from ..views import ProfileCompanyAPIView
+from ..views import ProfileBatchAPIView, ProfileCompanyAPIView
 
 
 class ProfileAPIViewSetTestCase(Settings):
     def setUp(self):
+        cache.clear()
         self.profile_url = reverse('user-detail', args=[self.user.id])
         self.refresh = RefreshToken.for_user(self.user)
 
@@ -31,20 +38,78 @@ class ProfileAPIViewSetTestCase(Settings):
         return client
 
     def test_retrieve_with_cache(self):
-        cache_key = settings.USER_PROFILE_CACHE_KEY.format(user=self.user.pk)
-        cache.delete(cache_key)
+        cache.clear()
         client = self.user_login()
-        client.get(self.profile_url)
-        self.assertIsNotNone(cache.get(cache_key))
+        response = client.get(self.profile_url)
+        version = cache.get(settings.USER_PROFILE_VERSION_CACHE_KEY.format(user=self.user.pk))
+        cache_key = settings.USER_PROFILE_CACHE_KEY.format(user=self.user.pk, version=version)
+        self.assertEqual(get_redis_client().get(make_redis_key(cache_key)), response.content)
+
+        with self.assertNumQueries(1):
+            cached = client.get(self.profile_url)
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached.json(), response.json())
 
     def test_update_invalidate_cache(self):
+        cache.clear()
         client = self.user_login()
-        cache_key = settings.USER_PROFILE_CACHE_KEY.format(user=self.user.pk)
         client.get(self.profile_url)
-        self.assertIsNotNone(cache.get(cache_key))
-        update_data = {'email': 'updateduser@gmail.com'}
-        response = client.patch(self.profile_url, update_data, format='json')
-        self.assertIsNone(cache.get(cache_key))
+        version_key = settings.USER_PROFILE_VERSION_CACHE_KEY.format(user=self.user.pk)
+        version = cache.get(version_key)
+        update_data = {'first_name': 'Updated'}
+        client.patch(self.profile_url, update_data, format='json')
+        self.assertEqual(cache.get(version_key), version + 1)
+        response = client.get(self.profile_url)
+        self.assertEqual(response.json()['first_name'], 'Updated')
+
+    def test_retrieve_not_modified(self):
+        cache.clear()
+        client = self.user_login()
+        response = client.get(self.profile_url)
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):
+            not_modified = client.get(self.profile_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified['ETag'], etag)
+        self.assertEqual(not_modified.content, b'')
+
+        client.patch(self.profile_url, {'first_name': 'Updated'}, format='json')
+        response = client.get(self.profile_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['first_name'], 'Updated')
+
+    def test_expired_version_does_not_reuse_etag(self):
+        cache.clear()
+        client = self.user_login()
+        client.patch(self.profile_url, {'first_name': 'Updated'}, format='json')
+        etag = client.get(self.profile_url)['ETag']
+        cache.clear()
+
+        response = client.get(self.profile_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_padded_pk_shares_the_cache_entry(self):
+        cache.clear()
+        client = self.user_login()
+        padded_url = reverse('user-detail', args=[f'0{self.user.id}'])
+        etag = client.get(padded_url)['ETag']
+        self.assertEqual(client.get(self.profile_url)['ETag'], etag)
+
+        client.patch(padded_url, {'first_name': 'Updated'}, format='json')
+        response = client.get(self.profile_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['first_name'], 'Updated')
+
+    def test_retrieve_non_numeric_pk(self):
+        client = self.user_login()
+        response = client.get(reverse('user-detail', args=['abc']))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertIsNone(get_redis_client().get(
+            make_redis_key(settings.USER_PROFILE_VERSION_CACHE_KEY.format(user='abc'))))
 
     def test_authenticated_user(self):
         client = self.user_login()
@@ -56,7 +121,7 @@ class ProfileAPIViewSetTestCase(Settings):
         response = client.get(self.profile_url)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
-    @patch('user_profile.views.requests.get')
+    @patch('core.company_client.CompanyServiceClient.get')
     def test_get_users_info_by_company(self, mock_get):
         mock_response = MagicMock()
         mock_response.status_code = 200
@@ -110,7 +175,7 @@ class ProfileAPIViewSetTestCase(Settings):
             response.data[0].pop('id')
             self.assertEqual(users_expected, response.data)
 
-    @patch('user_profile.views.requests.get')
+    @patch('core.company_client.CompanyServiceClient.get')
     def test_get_users_by_dep(self, mock_get):
         mock_response = MagicMock()
         mock_response.status_code = 200
@@ -159,7 +224,7 @@ class ProfileAPIViewSetTestCase(Settings):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data, data_expected)
 
-    @patch('user_profile.views.requests.get')
+    @patch('core.company_client.CompanyServiceClient.get')
     def test_get_users_by_deps(self, mock_get):
         mock_response = MagicMock()
         mock_response.status_code = 200
@@ -212,6 +277,15 @@ class ProfileAPIViewSetTestCase(Settings):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data, data_expected)
 
+    @patch('requests.Session.request', side_effect=requests.ConnectTimeout)
+    def test_get_users_by_deps_company_service_unavailable(self, mock_request):
+        client = self.user_login()
+        response = client.get(settings.REGISTRATION_SERVICE_URL + reverse('user-get_users_by_deps',
+                                                                          kwargs={"company_pk": 1}),
+                              HTTP_HOST='127.0.0.1')
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
 
 @patch('user_profile.serializers.upload_file', side_effect=mock_upload_file)
 class UpdateImportantDataAPIViewTestCase(APITestCase):
@@ -270,6 +344,129 @@ class UpdateImportantDataAPIViewTestCase(APITestCase):
         return SimpleUploadedFile('test.jpeg', file.getvalue(), content_type='image/jpeg')
 
 
+class LargeCompanyUsersInfoTestCase(Settings):
+    members = 3000
+
+    @patch('core.company_client.CompanyServiceClient.get')
+    def test_every_member_gets_own_positions_and_departments(self, mock_get):
+        cache.clear()
+        users = User.objects.bulk_create(
+            User(email=f'member-{i}@example.com', first_name=f'member {i}') for i in range(self.members))
+        company_users = [
+            {
+                'id': i,
+                'email': user.email,
+                'positions': [self.position(i)],
+                'departments': [self.department(i)],
+            }
+            for i, user in enumerate(users)
+        ]
+        company_users.append({'id': 0, 'email': users[0].email, 'positions': [self.position(-1)], 'departments': []})
+        mock_get.return_value = MagicMock(status_code=200, json=MagicMock(return_value=company_users))
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        start = time.perf_counter()
+        with self.assertNumQueries(2):
+            response = client.get(reverse('user-get_users_by_company', kwargs={'company_pk': 1}))
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), self.members)
+        for member in response.data:
+            i = int(member['email'].split('-')[1].split('@')[0])
+            expected_positions = [i, -1] if i == 0 else [i]
+            self.assertEqual([position['id'] for position in member['positions']], expected_positions)
+            self.assertEqual([department['id'] for department in member['departments']], [i])
+        self.assertLess(elapsed, 5)
+
+    @patch('core.company_client.CompanyServiceClient.get')
+    @override_settings(COMPANY_MEMBERS_STREAM_CHUNK_SIZE=2)
+    def test_streamed_members_match_rendered_response(self, mock_get):
+        cache.clear()
+        users = User.objects.bulk_create(
+            User(email=f'member-{i}@example.com', first_name=f'member {i}') for i in range(5))
+        company_users = [
+            {'id': i, 'email': user.email, 'positions': [self.position(i)], 'departments': []}
+            for i, user in enumerate(users)
+        ]
+        mock_get.return_value = MagicMock(status_code=200, json=MagicMock(return_value=company_users))
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = reverse('user-get_users_by_company', kwargs={'company_pk': 1})
+
+        rendered = client.get(url)
+        with self.assertNumQueries(4):
+            streamed = client.get(url, {'stream': 'true'})
+            content = b''.join(streamed.streaming_content)
+        self.assertTrue(streamed.streaming)
+        self.assertEqual(sorted(json.loads(content), key=lambda user: user['id']),
+                         sorted(rendered.json(), key=lambda user: user['id']))
+
+    @override_settings(COMPANY_DEPARTMENTS_STREAM_CHUNK_SIZE=2)
+    @patch('core.company_client.CompanyServiceClient.get')
+    def test_streamed_departments_match_rendered_response(self, mock_get):
+        cache.clear()
+        departments = [
+            {**self.department(i), 'users': [{'id': 1, 'email': self.user.email}]} for i in range(3)
+        ]
+        mock_get.return_value = MagicMock(status_code=200, json=MagicMock(return_value=departments))
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = reverse('user-get_users_by_deps', kwargs={'company_pk': 1})
+
+        rendered = client.get(url)
+        with self.assertNumQueries(2):
+            streamed = client.get(url, {'stream': '1'})
+            content = b''.join(streamed.streaming_content)
+        self.assertEqual(content, rendered.content)
+
+    @staticmethod
+    def position(i):
+        return {'id': i, 'title': f'position {i}', 'description': '', 'access_weight': 'Member', 'company': 1}
+
+    @staticmethod
+    def department(i):
+        return {'id': i, 'title': f'department {i}', 'description': '', 'parent': None, 'company': 1, 'color': ''}
+
+
+class CompanyCacheInvalidateAPIViewTestCase(Settings):
+
+    def setUp(self):
+        self.staff = User.objects.create_user(
+            email='staff@example.com', password='password', first_name='staff', last_name='user', is_staff=True)
+        self.url = reverse('company_cache_invalidate', kwargs={'company_pk': 1})
+
+    @patch('core.company_client.CompanyServiceClient.get')
+    def test_invalidation_refetches_company_data(self, mock_get):
+        cache.clear()
+        mock_get.return_value = MagicMock(status_code=200, json=MagicMock(return_value=[]))
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        url = reverse('user-get_users_by_company', kwargs={'company_pk': 1})
+        client.get(url)
+        client.get(url)
+        self.assertEqual(mock_get.call_count, 1)
+
+        response = client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        client.get(url)
+        self.assertEqual(mock_get.call_count, 2)
+
+    def test_regular_users_cannot_invalidate(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @patch('core.company_cache.get_redis_client', side_effect=RedisError('down'))
+    def test_unavailable_cache(self, mock_client):
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        response = client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
 class UserCompanyAPIViewSetTestCase(Settings):
 
     def setUp(self):
@@ -277,6 +474,27 @@ class UserCompanyAPIViewSetTestCase(Settings):
         self.url = reverse('company_profile')
         self.view = ProfileCompanyAPIView()
 
+    def list_profiles(self, **extra):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        return client.generic('GET', self.url, json.dumps({'emails': [self.user.email]}),
+                              content_type='application/json', **extra)
+
+    def test_list_not_modified(self):
+        response = self.list_profiles()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()[0]['email'], self.user.email)
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):
+            not_modified = self.list_profiles(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        bump_profile_version(self.user.id)
+        response = self.list_profiles(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
     def test_get_queryset(self):
         request = self.factory.post(self.url)
         request.data = {
@@ -289,3 +507,70 @@ class UserCompanyAPIViewSetTestCase(Settings):
             'phone', 'image_identifier', 'date_joined', 'links'
         )
         self.assertQuerySetEqual(queryset, correct_meaning)
+
+
+class ProfileBatchAPIViewTestCase(Settings):
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('profile_batch')
+        self.other = User.objects.create_user(
+            email='other@example.com', password='password', first_name='other', last_name='user')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def lookup(self, data):
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_lookup_by_emails_keeps_request_order(self):
+        profiles = self.lookup({'emails': [self.other.email, 'missing@example.com', self.user.email]})
+        self.assertEqual([profile['id'] for profile in profiles], [self.other.id, self.user.id])
+        self.assertEqual(profiles[1]['links'][0]['link'], self.user.links.first().link)
+
+    def test_cached_profiles_skip_the_database(self):
+        ids = [self.user.id, self.other.id]
+        profiles = self.lookup({'ids': ids})
+        with self.assertNumQueries(0):
+            self.assertEqual(self.lookup({'ids': ids}), profiles)
+
+        self.client.force_authenticate(self.other)
+        self.client.patch(reverse('user-detail', args=[self.other.id]), {'first_name': 'Updated'}, format='json')
+        with self.assertNumQueries(2):
+            profiles = self.lookup({'ids': ids})
+        self.assertEqual(profiles[1]['first_name'], 'Updated')
+
+    @override_settings(PROFILE_BATCH_CHUNK_SIZE=1)
+    def test_misses_are_loaded_per_chunk(self):
+        with self.assertNumQueries(6):
+            profiles = self.lookup({'emails': [self.user.email, self.other.email]})
+        self.assertEqual(len(profiles), 2)
+
+    def test_empty_result(self):
+        self.assertEqual(self.lookup({'ids': [10 ** 9]}), [])
+
+    def test_unknown_ids_leave_no_version_keys(self):
+        self.lookup({'ids': [10 ** 9, self.user.id]})
+        version_key = settings.USER_PROFILE_VERSION_CACHE_KEY
+        self.assertIsNone(get_redis_client().get(make_redis_key(version_key.format(user=10 ** 9))))
+        self.assertIsNotNone(get_redis_client().get(make_redis_key(version_key.format(user=self.user.id))))
+
+    def test_body_is_not_cached_under_a_counter_created_during_render(self):
+        render = ProfileBatchAPIView._render
+
+        def render_then_bump(user_ids):
+            rendered = render(user_ids)
+            bump_profile_version(self.user.id)
+            return rendered
+
+        with patch.object(ProfileBatchAPIView, '_render', staticmethod(render_then_bump)):
+            self.lookup({'ids': [self.user.id]})
+        with self.assertNumQueries(2):
+            self.lookup({'ids': [self.user.id]})
+
+    @override_settings(PROFILE_BATCH_MAX_SIZE=1)
+    def test_invalid_requests(self):
+        for data in ({}, {'ids': [1], 'emails': ['a@example.com']}, {'ids': [1, 2]}):
+            response = self.client.post(self.url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
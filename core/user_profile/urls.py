@@ -1,7 +1,8 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from user_profile.views import ProfileAPIVewSet, ImageAPIView, ProfileCompanyAPIView
+from user_profile.views import ProfileAPIVewSet, ImageAPIView, ProfileCompanyAPIView, ProfileBatchAPIView, \
+    CompanyCacheInvalidateAPIView
 
 router = DefaultRouter()
 router.register(r'profile', ProfileAPIVewSet)
@@ -9,5 +10,8 @@ router.register(r'profile', ProfileAPIVewSet)
 urlpatterns = [
     path('v1/', include(router.urls)),
     path('load-image/', ImageAPIView.as_view(), name='load_image'),
-    path('v1/company-for-profiles/', ProfileCompanyAPIView.as_view(), name='company_profile')
+    path('v1/company-for-profiles/', ProfileCompanyAPIView.as_view(), name='company_profile'),
+    path('v1/profiles/batch/', ProfileBatchAPIView.as_view(), name='profile_batch'),
+    path('v1/company/<int:company_pk>/cache/invalidate/', CompanyCacheInvalidateAPIView.as_view(),
+         name='company_cache_invalidate'),
 ]
\ No newline at end of file
@@ -1,23 +1,73 @@
+import hashlib
+
+from itertools import batched
+
 from django.conf import settings
-from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from drf_spectacular.utils import extend_schema
 from rest_framework import status
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.generics import ListAPIView
 from rest_framework.mixins import RetrieveModelMixin, UpdateModelMixin
 from rest_framework.parsers import MultiPartParser
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet, ReadOnlyModelViewSet
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.decorators import action
 
-import requests
-from django.forms.models import model_to_dict
-from core.swagger_info import response_for_upload_image, request_for_upload_image
+from core.company_cache import get_company_service_cache
+from core.exeptions import CompanyServiceCacheUnavailable
+from core.swagger_info import response_for_upload_image, request_for_upload_image, parameters_for_streaming
+from user_profile.aggregation import merge_department_profiles, positions_departments_by_email
 from user_profile.models import User
-from user_profile.serializers import ProfileUserSerializer, ImageSerializer, ProfileUserForCompanySerializer, ProfileUserForDepSerializer, DepartmentInfoSerializer
+from user_profile.profile_cache import bump_profile_version, get_batch_profiles, get_profile, get_profile_version, get_profile_versions
+from user_profile.serializers import ProfileUserSerializer, ImageSerializer, ProfileUserForCompanySerializer, DepartmentInfoSerializer, \
+    ProfileBatchSerializer, ProfileUserBatchSerializer
+
+
+def _profile_user_id(pk):
+    # The cache is keyed by user id, so "01" and "1" must not end up with separate versions and bodies.
+    try:
+        return int(pk)
+    except (TypeError, ValueError):
+        raise NotFound()
+
+
+def _profile_etag(version):
+    return None if version is None else quote_etag(str(version))
+
+
+def _profiles_etag(versions):
+    if versions is None:
+        return None
+    marker = ','.join(f'{user}:{version}' for user, version in sorted(versions.items()))
+    return quote_etag(hashlib.sha256(marker.encode()).hexdigest())
+
+
+def _json_array(elements):
+    separator = b'['
+    for element in elements:
+        yield separator + element
+        separator = b','
+    yield b'[]' if separator == b'[' else b']'
+
+
+def _streaming_requested(request):
+    return request.query_params.get('stream', '').lower() in ('1', 'true')
+
+
+def _not_modified_response(request, etag):
+    if etag is None:
+        return None
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response['ETag'] = etag
+    return response
 
 
 class ProfileAPIVewSet(GenericViewSet, RetrieveModelMixin, UpdateModelMixin):
@@ -26,37 +76,45 @@ class ProfileAPIVewSet(GenericViewSet, RetrieveModelMixin, UpdateModelMixin):
                                                  'notification').prefetch_related('links')
     permission_classes = (IsAuthenticated,)
 
-    def get_object(self):
-        user = self.kwargs.get('pk')
-        cache_key = settings.USER_PROFILE_CACHE_KEY.format(user=user)
-        instance = cache.get(cache_key)
-        if instance is None:
-            instance = super().get_object()
-            cache.set(cache_key, instance, timeout=settings.CACHE_LIVE_TIME)
-        return instance
+    def retrieve(self, request, *args, **kwargs):
+        user = _profile_user_id(self.kwargs.get('pk'))
+        if request.headers.get('If-None-Match'):
+            not_modified = _not_modified_response(request, _profile_etag(get_profile_version(user)))
+            if not_modified is not None:
+                return not_modified
+
+        version, body = get_profile(
+            user,
+            lambda: JSONRenderer().render(self.get_serializer(self.get_object()).data)
+        )
+        response = HttpResponse(body, content_type='application/json')
+        if version is not None:
+            response['ETag'] = _profile_etag(version)
+        return response
 
     def update(self, request, *args, **kwargs):
+        user = _profile_user_id(self.kwargs.get('pk'))
         response = super().update(request, *args, **kwargs)
-        user = self.kwargs.get('pk')
-        cache_key = settings.USER_PROFILE_CACHE_KEY.format(user=user)
-        cache.delete(cache_key)
+        bump_profile_version(user)
         return response
 
+    @extend_schema(parameters=parameters_for_streaming)
     @action(methods=['get'], detail=False, url_path='users-info-by-company/(?P<company_pk>\d+)', url_name='get_users_by_company')
     def get_users_by_company(self, request, company_pk):
-        url = settings.COMPANY_SERVICE_URL.format(
-            f'api/v1/company/companies/{company_pk}/users-emails/')
-        response = requests.get(url=url)
-        if response.status_code != 200:
-            return Response({'detail': "company info wasn't get"}, status=response.status_code)
-        response_data = response.json()
-
-        users_pos_deps = [(user.get('positions', None), user.get(
-            'departments', None)) for user in response_data]
-        emails = [user.get('email', None) for user in response_data]
-
-        users = User.objects.filter(email__in=emails).prefetch_related('links')
-        context = {'emails': emails, 'pos_deps': users_pos_deps}
+        status_code, response_data = get_company_service_cache().get(
+            company_pk, f'api/v1/company/companies/{company_pk}/users-emails/')
+        if status_code != 200:
+            return Response({'detail': "company info wasn't get"}, status=status_code)
+        positions_departments = positions_departments_by_email(response_data)
+        users = User.objects.filter(email__in=list(positions_departments)).prefetch_related('links')
+        context = {'positions_departments': positions_departments}
+        if _streaming_requested(request):
+            chunk_size = settings.COMPANY_MEMBERS_STREAM_CHUNK_SIZE
+            return StreamingHttpResponse(_json_array(
+                JSONRenderer().render(user)
+                for chunk in batched(users.iterator(chunk_size=chunk_size), chunk_size)
+                for user in ProfileUserForCompanySerializer(chunk, many=True, context=context).data
+            ), content_type='application/json')
         users_info = ProfileUserForCompanySerializer(
             users, many=True, context=context)
 
@@ -64,52 +122,31 @@ class ProfileAPIVewSet(GenericViewSet, RetrieveModelMixin, UpdateModelMixin):
 
     @action(methods=['get'], detail=False, url_path='company/(?P<company_pk>\d+)/dep/(?P<dep_pk>\d+)', url_name='get_users_by_dep')
     def get_users_by_dep(self, request, company_pk, dep_pk):
-        url = settings.COMPANY_SERVICE_URL.format(
-            f'api/v1/company/companies/{company_pk}/departments/{dep_pk}/')
-        response = requests.get(url=url, )
-        if response.status_code != 200:
-            return Response({"error": "info wasn't get"}, status=response.status_code)
-        department_data = response.json()
-
-        users_emails = [user['email'] for user in department_data['users']]
-        users = User.objects.filter(email__in=users_emails)
-        users_info = [model_to_dict(
-            user, fields=ProfileUserForDepSerializer.Meta.fields) for user in users]
-
-        for user in department_data['users']:
-            for user_info in users_info:
-                if user_info['email'] == user['email']:
-                    user.update(user_info)
-                    break
-
+        status_code, department_data = get_company_service_cache().get(
+            company_pk, f'api/v1/company/companies/{company_pk}/departments/{dep_pk}/')
+        if status_code != 200:
+            return Response({"error": "info wasn't get"}, status=status_code)
+        merge_department_profiles([department_data])
         department_ser = DepartmentInfoSerializer(department_data)
 
         return Response(department_ser.data, status=status.HTTP_200_OK)
 
+    @extend_schema(parameters=parameters_for_streaming)
     @action(methods=['get'], detail=False, url_path='company/(?P<company_pk>\d+)/deps', url_name='get_users_by_deps')
     def get_users_by_deps(self, request, company_pk):
-        url = settings.COMPANY_SERVICE_URL.format(
-            f'api/v1/company/companies/{company_pk}/departments/')
-        response = requests.get(url=url, )
-        if response.status_code != 200:
-            return Response({"error": "info wasn't get"}, status=response.status_code)
-        departments_data = response.json()
-
-        users_emails = []
-        for department in departments_data:
-            for user in department['users']:
-                users_emails.append(user['email'])
-        users = User.objects.filter(email__in=users_emails)
-        users_info = [model_to_dict(
-            user, fields=ProfileUserForDepSerializer.Meta.fields) for user in users]
-
-        for department in departments_data:
-            for user in department['users']:
-                for user_info in users_info:
-                    if user['email'] == user_info['email']:
-                        user.update(user_info)
-                        break
-
+        status_code, departments_data = get_company_service_cache().get(
+            company_pk, f'api/v1/company/companies/{company_pk}/departments/')
+        if status_code != 200:
+            return Response({"error": "info wasn't get"}, status=status_code)
+        if _streaming_requested(request):
+            # Departments are merged a chunk at a time, one query per chunk, so only that chunk's profiles are held.
+            chunk_size = settings.COMPANY_DEPARTMENTS_STREAM_CHUNK_SIZE
+            return StreamingHttpResponse(_json_array(
+                JSONRenderer().render(department)
+                for chunk in batched(departments_data, chunk_size)
+                for department in DepartmentInfoSerializer(merge_department_profiles(chunk), many=True).data
+            ), content_type='application/json')
+        merge_department_profiles(departments_data)
         departments_ser = DepartmentInfoSerializer(departments_data, many=True)
 
         return Response(departments_ser.data, status=status.HTTP_200_OK)
@@ -146,15 +183,71 @@ class ImageAPIView(APIView):
 
 
 @extend_schema(
-    tags=["User for company"]
+    tags=["User for company"],
+    deprecated=True,
+    description='Reads emails from the body of a GET, use the profile batch lookup instead',
 )
 class ProfileCompanyAPIView(ListAPIView):
     serializer_class = ProfileUserForCompanySerializer
     permission_classes = (IsAuthenticated,)
 
+    def list(self, request, *args, **kwargs):
+        user_ids = User.objects.filter(email__in=request.data.get('emails', [])).values_list('id', flat=True)
+        etag = _profiles_etag(get_profile_versions(user_ids))
+        not_modified = _not_modified_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+        response = super().list(request, *args, **kwargs)
+        if etag is not None:
+            response['ETag'] = etag
+        return response
+
     def get_queryset(self):
         emails = self.request.data.get('emails', [])
         return User.objects.prefetch_related('links').filter(email__in=emails).only(
             'id', 'first_name', 'last_name',
             'phone', 'image_identifier', 'date_joined', 'links'
         )
+
+
+@extend_schema(
+    tags=["User for company"]
+)
+class ProfileBatchAPIView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(request=ProfileBatchSerializer, responses=ProfileUserBatchSerializer(many=True))
+    def post(self, request):
+        serializer = ProfileBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return StreamingHttpResponse(_json_array(self._stream(serializer.validated_data)), content_type='application/json')
+
+    def _stream(self, data):
+        values = list(dict.fromkeys(data.get('emails', data.get('ids'))))
+        for chunk in batched(values, settings.PROFILE_BATCH_CHUNK_SIZE):
+            user_ids = self._resolve_emails(chunk) if 'emails' in data else chunk
+            yield from get_batch_profiles(user_ids, self._render)
+
+    @staticmethod
+    def _resolve_emails(emails):
+        user_ids = dict(User.objects.filter(email__in=emails).values_list('email', 'id'))
+        return [user_ids[email] for email in emails if email in user_ids]
+
+    @staticmethod
+    def _render(user_ids):
+        users = User.objects.filter(id__in=user_ids).prefetch_related('links')
+        return {str(user.id): JSONRenderer().render(ProfileUserBatchSerializer(user).data) for user in users}
+
+
+@extend_schema(
+    tags=["User for company"]
+)
+class CompanyCacheInvalidateAPIView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(request=None, responses={204: None})
+    def post(self, request, company_pk):
+        if not get_company_service_cache().invalidate(company_pk):
+            raise CompanyServiceCacheUnavailable()
+        return Response(status=status.HTTP_204_NO_CONTENT)